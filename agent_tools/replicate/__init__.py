@@ -3,30 +3,53 @@ Replicate Agent Tools Package
 
 This package provides comprehensive tools for interacting with Replicate's API,
 including model management, prediction execution, and AI code generation.
+
+Submodules are imported on first attribute access (PEP 562), so importing the
+package itself doesn't pull in requests, pydantic or langchain until a tool
+factory is actually used.
 """
 
-from .replicate_tools import create_replicate_tools
-from .models import (
-    list_replicate_models, get_replicate_model, create_replicate_model,
-    update_replicate_model, delete_replicate_model
-)
-from .predictions import (
-    create_replicate_prediction, get_replicate_prediction, cancel_replicate_prediction,
-    list_replicate_predictions, stream_replicate_prediction
-)
-from .code_generation import (
-    generate_code_replicate, optimize_code_replicate, debug_code_replicate,
-    explain_code_replicate, convert_code_replicate
-)
+import importlib
 
 __version__ = "1.0.0"
 __author__ = "Jonathan Toky"
 __email__ = "jonathan@example.com"
 
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'create_replicate_tools': 'replicate_tools',
+    'list_replicate_models': 'models',
+    'get_replicate_model': 'models',
+    'get_replicate_models_batch': 'models',
+    'create_replicate_model': 'models',
+    'update_replicate_model': 'models',
+    'delete_replicate_model': 'models',
+    'create_replicate_prediction': 'predictions',
+    'get_replicate_prediction': 'predictions',
+    'cancel_replicate_prediction': 'predictions',
+    'list_replicate_predictions': 'predictions',
+    'stream_replicate_prediction': 'predictions',
+    'generate_code_replicate': 'code_generation',
+    'optimize_code_replicate': 'code_generation',
+    'debug_code_replicate': 'code_generation',
+    'explain_code_replicate': 'code_generation',
+    'convert_code_replicate': 'code_generation',
+    'generate_code_batch_replicate': 'code_generation',
+    'run_many_replicate': 'code_generation',
+    'warm_up': '_http',
+    'warm_up_async': '_http',
+}
+
+# Names from the older replicate.py naming scheme -> canonical names
+_ALIASES = {
+    'generate_code_with_replicate': 'generate_code_replicate',
+}
+
 __all__ = [
     'create_replicate_tools',
     'list_replicate_models',
     'get_replicate_model',
+    'get_replicate_models_batch',
     'create_replicate_model',
     'update_replicate_model',
     'delete_replicate_model',
@@ -39,5 +62,24 @@ __all__ = [
     'optimize_code_replicate',
     'debug_code_replicate',
     'explain_code_replicate',
-    'convert_code_replicate'
-]
\ No newline at end of file
+    'convert_code_replicate',
+    'generate_code_batch_replicate',
+    'run_many_replicate',
+    'warm_up',
+    'warm_up_async'
+]
+
+
+def __getattr__(name):
+    target = _ALIASES.get(name, name)
+    module_name = _EXPORTS.get(target)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), target)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | set(_ALIASES))
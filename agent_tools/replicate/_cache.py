@@ -0,0 +1,235 @@
+"""
+Response cache for Replicate predictions.
+
+Completed prediction output is kept in a bounded in-process LRU with a TTL,
+keyed by a SHA-256 of the caller's credential, the model and its input, so a
+repeated identical request returns immediately instead of creating a new
+prediction.
+
+An optional SQLite-backed disk cache sits behind the in-process one so
+output also survives restarts. It is controlled by REPLICATE_CACHE_MODE
+(off, readonly, readwrite or writeonly; off by default, and off with a
+warning if unrecognised) and stored under REPLICATE_CACHE_DIR.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+
+
+CACHE_MAX_ENTRIES = 1000
+CACHE_TTL = 3600  # 1 hour
+
+DISK_CACHE_TTL = 7 * 86400  # 7 days
+DISK_CACHE_MAX_ENTRIES = 10000
+DISK_CACHE_DIR = "~/.cache/replicate_tools"
+DISK_CACHE_MODES = ("off", "readonly", "readwrite", "writeonly")
+
+
+def _hash_field(digest, value):
+    """Feed one tagged, length-prefixed value into a running hash"""
+    if isinstance(value, str):
+        tag, data = b"s", value.encode()
+    else:
+        tag, data = b"j", json.dumps(value, sort_keys=True).encode()
+    digest.update(tag + len(data).to_bytes(8, "big"))
+    digest.update(data)
+
+
+def cache_key(credential, model_name, input_data):
+    """
+    Hash a credential, model name and prediction input into a cache key.
+
+    The credential keeps output fetched with one token from being served to
+    a caller using another (who may not have access to the model). Fields
+    are hashed one at a time in key order, so a large prompt is fed to
+    SHA-256 directly instead of first being copied into a JSON document.
+    """
+    digest = hashlib.sha256()
+    _hash_field(digest, credential)
+    _hash_field(digest, model_name)
+    for name in sorted(input_data):
+        _hash_field(digest, name)
+        _hash_field(digest, input_data[name])
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    Persistent cache of prediction output in a SQLite file.
+
+    Reads and writes are best-effort: a cache that can't be opened or
+    written behaves like a miss rather than failing the prediction. Each
+    write drops expired entries and, past max_entries, the oldest ones.
+    """
+
+    def __init__(self, directory=DISK_CACHE_DIR, mode="readwrite", ttl=DISK_CACHE_TTL,
+                 max_entries=DISK_CACHE_MAX_ENTRIES):
+        if mode not in DISK_CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {', '.join(DISK_CACHE_MODES)}")
+
+        self.path = os.path.join(os.path.expanduser(directory), "predictions.sqlite3")
+        self.mode = mode
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def readable(self):
+        return self.mode in ("readonly", "readwrite")
+
+    @property
+    def writable(self):
+        return self.mode in ("writeonly", "readwrite")
+
+    def _connect(self):
+        """Open the database on first use, dropping entries that have expired"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_expiry ON predictions (expires_at)")
+            conn.execute("DELETE FROM predictions WHERE expires_at <= ?", (time.time(),))
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        """Return the stored value for key, or None if missing, expired or disabled"""
+        if not self.readable:
+            return None
+
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value FROM predictions WHERE key = ? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        return row[0] if row else None
+
+    def set(self, key, value):
+        """Store value under key for the cache's TTL"""
+        if not self.writable:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO predictions (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, now + self.ttl)
+                )
+                conn.execute("DELETE FROM predictions WHERE expires_at <= ?", (now,))
+                # Every entry shares one TTL, so the earliest expiry is the oldest write
+                conn.execute(
+                    "DELETE FROM predictions WHERE key IN "
+                    "(SELECT key FROM predictions ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except (sqlite3.Error, OSError):
+            pass
+
+    def clear(self):
+        """Drop every stored entry"""
+        if self.mode == "off":
+            return
+
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM predictions")
+        except (sqlite3.Error, OSError):
+            pass
+
+
+def _disk_cache_from_env():
+    """
+    Build the shared disk cache from REPLICATE_CACHE_MODE and REPLICATE_CACHE_DIR.
+
+    An unknown mode turns the cache off with a warning rather than raising,
+    so a typo in the environment can't break importing the tools.
+    """
+    mode = os.environ.get("REPLICATE_CACHE_MODE", "off")
+    if mode not in DISK_CACHE_MODES:
+        warnings.warn(
+            f"Unknown REPLICATE_CACHE_MODE {mode!r}, expected one of {', '.join(DISK_CACHE_MODES)}; "
+            "disabling the disk cache",
+            RuntimeWarning
+        )
+        mode = "off"
+    return DiskCache(os.environ.get("REPLICATE_CACHE_DIR", DISK_CACHE_DIR), mode=mode)
+
+
+RESPONSE_CACHE = ResponseCache()
+DISK_CACHE = _disk_cache_from_env()
+
+
+def get_cached_output(key):
+    """
+    Look up prediction output in memory, then on disk.
+
+    A disk hit is promoted into the in-process cache.
+    """
+    output = RESPONSE_CACHE.get(key)
+    if output is None:
+        output = DISK_CACHE.get(key)
+        if output is not None:
+            RESPONSE_CACHE.set(key, output)
+    return output
+
+
+def store_output(key, output):
+    """Record successful prediction output in every enabled cache layer"""
+    RESPONSE_CACHE.set(key, output)
+    DISK_CACHE.set(key, output)
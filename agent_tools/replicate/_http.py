@@ -0,0 +1,370 @@
+"""
+Shared HTTP plumbing for the Replicate tools.
+
+The tool closures talk to api.replicate.com through one pooled
+requests.Session so TCP/TLS connections are reused across polls and
+across tool invocations instead of being re-established on every call.
+
+Setting REPLICATE_HTTPX=1 with httpx installed sends the async tools'
+requests through a shared httpx.AsyncClient instead, so they run on the
+event loop rather than on worker threads. With h2 installed as well the
+client speaks HTTP/2 and concurrent predictions multiplex their polls over
+a single connection.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import __version__
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (required by httpx for http2=True)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+REPLICATE_API_BASE = "https://api.replicate.com/v1"
+
+# Connection pool sizing for the shared session
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 64
+
+# Connection limits for the async httpx client
+ASYNC_MAX_CONNECTIONS = 100
+ASYNC_MAX_KEEPALIVE = 20
+
+# Prediction creation is rate limited by Replicate (600 per minute); stay
+# under it with a token bucket refilled at this rate, allowing short bursts
+PREDICTION_RATE = 10  # per second
+PREDICTION_BURST = 50
+
+# (connect, read) timeouts in seconds for API calls made through the session
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# Up to this many seconds are added at random to each retry backoff so
+# clients throttled together don't all retry at the same moment
+RETRY_JITTER = 0.3
+
+# After this many consecutive failed API calls (5xx or no response) the
+# session and the async client fail fast for BREAKER_RESET seconds instead
+# of sending requests. Prediction cancels are always let through, so
+# predictions already running aren't left without an owner.
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 30
+
+USER_AGENT = f"agent-tools-replicate/{__version__}"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    After threshold consecutive failures the circuit opens and allow()
+    refuses calls for reset_after seconds. The first call after that is let
+    through as a trial: a success closes the circuit, a failure keeps it
+    open for another reset_after.
+    """
+
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_after:
+                # Half-open: restart the clock so only this call gets through
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised in place of sending a request while the circuit is open"""
+
+
+def _breaker_allows(breaker, method, url):
+    """Whether a request may be sent, exempting prediction cancels from an open circuit"""
+    if method == "POST" and str(url).endswith("/cancel"):
+        return True
+    return breaker.allow()
+
+
+class _BreakerAdapter(HTTPAdapter):
+    """HTTPAdapter that reports each outcome to a circuit breaker and fails fast while it is open"""
+
+    def __init__(self, breaker, **kwargs):
+        self.breaker = breaker
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if not _breaker_allows(self.breaker, request.method, request.url):
+            raise CircuitOpenError(
+                "Replicate API unavailable after repeated failures; try again shortly",
+                request=request
+            )
+
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+
+if httpx is not None:
+    class _BreakerTransport(httpx.AsyncBaseTransport):
+        """httpx counterpart of _BreakerAdapter, wrapping the async client's transport"""
+
+        def __init__(self, breaker, transport):
+            self.breaker = breaker
+            self.transport = transport
+
+        async def handle_async_request(self, request):
+            if not _breaker_allows(self.breaker, request.method, request.url):
+                raise CircuitOpenError("Replicate API unavailable after repeated failures; try again shortly")
+
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                raise
+
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return response
+
+        async def aclose(self):
+            await self.transport.aclose()
+
+
+API_BREAKER = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET)
+
+
+def _create_session():
+    """Build the pooled session shared by every Replicate tool"""
+    # Only idempotent methods are retried (urllib3 default), so a POST that
+    # creates a prediction is never sent twice. A Retry-After header on a
+    # 429 or 503 takes precedence over the backoff.
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        backoff_jitter=RETRY_JITTER,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False
+    )
+    adapter = _BreakerAdapter(
+        API_BREAKER,
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retries
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+SESSION = _create_session()
+
+
+def api_headers(access_token, content_type=None):
+    """
+    Build the headers for Replicate API calls made with access_token.
+
+    Tool factories call this once and close over the result; requests copies
+    it into each prepared request, so the dict is safe to share. Pass
+    content_type only for tools that send a request body.
+    """
+    headers = {
+        "Authorization": f"Token {access_token}",
+        "Accept": "application/json"
+    }
+    if content_type:
+        headers["Content-Type"] = content_type
+    return headers
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Each acquire takes one token, waiting for the bucket to refill if it is
+    empty. Callers that find it empty reserve the next tokens in turn, so
+    waiters are released at the refill rate rather than all at once.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token, returning how long to wait before it is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+PREDICTION_RATE_LIMITER = TokenBucket(PREDICTION_RATE, PREDICTION_BURST)
+
+USE_HTTPX = httpx is not None and os.environ.get("REPLICATE_HTTPX", "").lower() in ("1", "true", "yes")
+
+# One async client per event loop; httpx connections can't be shared
+# across loops
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """Return the httpx client for the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        transport = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=ASYNC_MAX_KEEPALIVE)
+        )
+        client = _ASYNC_CLIENTS[loop] = httpx.AsyncClient(
+            transport=_BreakerTransport(API_BREAKER, transport),
+            headers={"User-Agent": USER_AGENT},
+            timeout=httpx.Timeout(connect=5, read=65, write=10, pool=5)
+        )
+    return client
+
+
+def warm_up():
+    """
+    Open a pooled connection to the API ahead of the first real request.
+
+    Call this from agent startup so the first tool call skips the TCP/TLS
+    handshake. Failures are ignored; the request path retries as usual.
+    """
+    try:
+        SESSION.head(REPLICATE_API_BASE, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException:
+        pass
+
+
+async def warm_up_async():
+    """Async counterpart of warm_up, warming the httpx client when it is in use"""
+    if not USE_HTTPX:
+        await asyncio.to_thread(warm_up)
+        return
+
+    try:
+        await get_async_client().head(REPLICATE_API_BASE)
+    except httpx.HTTPError:
+        pass
+
+
+class SSEParser:
+    """Incremental server-sent event parser, fed one line at a time"""
+
+    def __init__(self):
+        self._event, self._data = 'message', []
+
+    def feed(self, line):
+        """Consume a line, returning (event, data) if it completes an event"""
+        if not line:
+            return self.flush()
+        if line.startswith('event:'):
+            self._event = line[6:].strip()
+        elif line.startswith('data:'):
+            value = line[5:]
+            self._data.append(value[1:] if value.startswith(' ') else value)
+        return None
+
+    def flush(self):
+        """Return the pending event, if any, and start a new one"""
+        event, data = self._event, self._data
+        self._event, self._data = 'message', []
+        if data:
+            return event, '\n'.join(data)
+        return None
+
+
+def iter_sse_events(lines):
+    """Group server-sent event lines into (event, data) pairs"""
+    parser = SSEParser()
+    for line in lines:
+        event = parser.feed(line)
+        if event:
+            yield event
+    event = parser.flush()
+    if event:
+        yield event
+
+
+def parse_json(response):
+    """Decode a response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def dump_json(data):
+    """Encode a request body to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    # Same compact, UTF-8 output orjson produces
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
@@ -0,0 +1,51 @@
+"""
+Helpers shared by the Replicate tool factories.
+
+StructuredTool is imported on first use, and built tools are memoized per
+(name, description, token) so registering the same tool again reuses it
+instead of rebuilding its schema.
+"""
+
+import functools
+
+
+# Tools kept per memoized factory
+TOOL_CACHE_SIZE = 256
+
+
+def extract_token_from_data(token_data):
+    """Extract token from various token formats"""
+    if isinstance(token_data, str):
+        return token_data
+    elif isinstance(token_data, dict):
+        return token_data.get('token') or token_data.get('access_token') or token_data.get('api_key')
+    return str(token_data)
+
+
+@functools.cache
+def structured_tool():
+    """
+    Import StructuredTool on first use.
+
+    langchain_core is by far the slowest import here, so it is deferred
+    until a tool is actually built rather than paid on module import.
+    """
+    from langchain_core.tools import StructuredTool
+    return StructuredTool
+
+
+def memoize_tool(factory):
+    """
+    Cache a tool factory's StructuredTool by name, description and token.
+
+    The token is reduced to its string form first so dict-style tokens can
+    be used as cache keys and each credential still gets its own tool.
+    """
+    build = functools.lru_cache(maxsize=TOOL_CACHE_SIZE)(factory)
+
+    @functools.wraps(factory)
+    def wrapper(name, description, token):
+        return build(name, description, extract_token_from_data(token))
+
+    wrapper.cache_clear = build.cache_clear
+    return wrapper
@@ -5,31 +5,593 @@ This module provides AI-powered code generation tools using Replicate models
 for generating, optimizing, debugging, explaining, and converting code.
 """
 
-from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+import asyncio
+import random
 import requests
-import json
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import MappingProxyType
 
+from ._cache import cache_key, get_cached_output, store_output
+from ._http import (
+    SESSION, REPLICATE_API_BASE, CONNECT_TIMEOUT, READ_TIMEOUT, REQUEST_TIMEOUT, USE_HTTPX,
+    PREDICTION_RATE_LIMITER, SSEParser, api_headers, dump_json, get_async_client, iter_sse_events, parse_json
+)
+from ._tools import extract_token_from_data, memoize_tool, structured_tool
 
-def extract_token_from_data(token_data):
-    """Extract token from various token formats"""
-    if isinstance(token_data, str):
-        return token_data
-    elif isinstance(token_data, dict):
-        return token_data.get('token') or token_data.get('access_token') or token_data.get('api_key')
-    return str(token_data)
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 
 # Default code generation models
-DEFAULT_CODE_MODELS = {
+DEFAULT_CODE_MODELS = MappingProxyType({
     "code_generation": "meta/codellama-34b-instruct",
     "code_optimization": "meta/codellama-34b-instruct",
     "code_debugging": "meta/codellama-34b-instruct",
     "code_explanation": "meta/codellama-34b-instruct",
     "code_conversion": "meta/codellama-34b-instruct"
-}
+})
+
+# Prompt templates, filled in with str.format on each call. The fixed
+# instructions come first and the caller's prompt or code last, so repeated
+# calls share the longest possible prefix for inference-side prompt caching.
+_GENERATE_PROMPT_TEMPLATE = """You are an expert {language} programmer. Generate clean, efficient, and well-documented code based on the requirements below.
+
+Please provide:
+1. Clean, readable code
+2. Appropriate comments
+3. Error handling where necessary
+4. Best practices for {language}
+
+Generate only the code, no additional explanations unless specifically requested.
+
+Requirements: {prompt}"""
+
+_OPTIMIZE_PROMPT_TEMPLATE = """You are an expert {language} programmer specializing in code optimization. 
+Analyze the code below and optimize it.
+
+Please provide:
+1. Optimized version of the code
+2. Explanation of changes made
+3. Performance/improvement benefits
+4. Any trade-offs or considerations
+
+Focus on: {optimization_focus}
+
+Original code:
+```{language}
+{code}
+```"""
+
+_DEBUG_PROMPT_TEMPLATE = """You are an expert {language} programmer and debugger. 
+Analyze the code below and identify issues, bugs, or potential problems.
+
+Please provide:
+1. Identification of issues/bugs
+2. Corrected version of the code
+3. Explanation of what was wrong
+4. Best practices to avoid similar issues
+5. Testing suggestions
+
+Be thorough and provide working solutions.
+
+Code to debug:
+```{language}
+{code}
+```{error_context}"""
+
+_EXPLAIN_PROMPT_TEMPLATE = """You are an expert {language} programmer and teacher. 
+Explain the code below in a clear and educational manner.
+
+Please provide:
+1. Overall purpose and functionality
+2. Step-by-step breakdown
+3. Key concepts and techniques used
+4. Input/output behavior
+5. Time/space complexity (if applicable)
+6. Potential use cases
+7. Related concepts or improvements
+
+Make it educational and easy to understand.
+
+Instructions: {instruction}
+
+Code to explain:
+```{language}
+{code}
+```"""
+
+_CONVERT_PROMPT_TEMPLATE = """You are an expert programmer fluent in multiple programming languages. 
+Convert the {source_language} code below to {target_language}.
+
+Instructions:
+1. Convert the code to idiomatic {target_language}
+2. Maintain the same functionality and logic
+3. Use {target_language} best practices and conventions
+4. {comment_instruction}
+5. Handle language-specific features appropriately
+6. Provide equivalent libraries/modules where needed
+
+Please provide:
+1. Converted code
+2. Notes about any significant changes or considerations
+3. Required imports/dependencies for {target_language}
+4. Any limitations or differences in behavior
+
+Make sure the converted code is functional and follows {target_language} standards.
+
+Source code ({source_language}):
+```{source_language}
+{code}
+```"""
+
+# Explanation instructions by detail level
+EXPLANATION_DETAIL_INSTRUCTIONS = MappingProxyType({
+    "basic": "Provide a brief, high-level explanation suitable for beginners",
+    "medium": "Provide a detailed explanation with examples and context",
+    "detailed": "Provide a comprehensive explanation with technical details, complexity analysis, and best practices"
+})
+
+# Conversion instruction on comments, by preserve_comments
+COMMENT_INSTRUCTIONS = MappingProxyType({
+    True: "Preserve and convert comments appropriately",
+    False: "Focus on code conversion, comments optional"
+})
+
+PREDICTIONS_URL = f"{REPLICATE_API_BASE}/predictions"
+
+# Prediction polling settings: the wait between status checks starts at
+# POLL_INITIAL seconds and grows by POLL_BASE per poll up to POLL_CAP, with
+# +/- POLL_JITTER applied so concurrent callers don't poll in lockstep.
+MAX_WAIT = 300  # 5 minutes
+POLL_INITIAL = 0.1
+POLL_BASE = 1.3
+POLL_CAP = 10.0
+POLL_JITTER = 0.2
+
+# Seconds the API may hold the create request open (Prefer: wait) so short
+# predictions come back finished without any streaming or polling
+PREFER_WAIT = 60
+
+# Timeout for the best-effort cancel sent when a prediction is abandoned
+CANCEL_TIMEOUT = 5
+
+
+def _poll_delays():
+    """Yield the wait before each successive status poll"""
+    delay = POLL_INITIAL
+    while True:
+        yield delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        delay = min(delay * POLL_BASE, POLL_CAP)
+
+
+def _build_headers(token):
+    """Build the request headers for a code tool, once per tool"""
+    return api_headers(extract_token_from_data(token))
+
+
+def _prediction_outcome(status_data):
+    """
+    Map a polled prediction to a terminal outcome.
+
+    Returns ('succeeded', output_text), ('failed', error) or ('canceled',
+    None), or None while the prediction is still running.
+    """
+    status = status_data.get('status')
+
+    if status == 'succeeded':
+        output = status_data.get('output')
+        if isinstance(output, list):
+            return 'succeeded', ''.join(output)
+        return 'succeeded', str(output)
+
+    if status == 'failed':
+        return 'failed', status_data.get('error', 'Unknown error')
+
+    if status == 'canceled':
+        return 'canceled', None
+
+    return None
+
+
+def _apply_stream_event(event, data, output):
+    """
+    Apply one stream event to the output collected so far.
+
+    Returns (finished, outcome): finished is True once the stream has
+    nothing more to say, with outcome the terminal result, or None if the
+    caller should fall back to polling.
+    """
+    if event == 'output':
+        output.append(data)
+    elif event == 'error':
+        return True, ('failed', data or 'Unknown error')
+    elif event == 'done':
+        # A done event carrying a reason means the prediction was
+        # canceled or errored; let the status poll report it.
+        if data.strip() not in ('', '{}'):
+            return True, None
+        return True, ('succeeded', ''.join(output))
+    return False, None
+
+
+def _read_prediction_stream(stream_url, headers, deadline):
+    """
+    Collect a prediction's output from its server-sent event stream.
+
+    Returns ('succeeded', output_text) or ('failed', error) when the stream
+    reports completion, or None if it ends any other way (closed early,
+    dropped, canceled, deadline reached) so the caller can fall back to
+    polling.
+    """
+    stream_headers = {**headers, "Accept": "text/event-stream", "Cache-Control": "no-store"}
+    read_timeout = max(deadline - time.monotonic(), 1)
+
+    try:
+        with SESSION.get(stream_url, headers=stream_headers, stream=True, timeout=(CONNECT_TIMEOUT, read_timeout)) as response:
+            if response.status_code != 200:
+                return None
+
+            response.encoding = 'utf-8'
+            output = []
+            for event, data in iter_sse_events(response.iter_lines(decode_unicode=True)):
+                finished, outcome = _apply_stream_event(event, data, output)
+                if finished:
+                    return outcome
+
+                if time.monotonic() >= deadline:
+                    return None
+    except requests.RequestException:
+        return None
+
+    return None
+
+
+async def _read_prediction_stream_async(stream_url, headers, deadline):
+    """
+    Async counterpart of _read_prediction_stream.
+
+    Reads the stream on the event loop through the shared httpx client when
+    REPLICATE_HTTPX is enabled, otherwise on a worker thread.
+    """
+    if not USE_HTTPX:
+        return await asyncio.to_thread(_read_prediction_stream, stream_url, headers, deadline)
+
+    stream_headers = {**headers, "Accept": "text/event-stream", "Cache-Control": "no-store"}
+    read_timeout = max(deadline - time.monotonic(), 1)
+
+    try:
+        async with get_async_client().stream("GET", stream_url, headers=stream_headers, timeout=read_timeout) as response:
+            if response.status_code != 200:
+                return None
+
+            parser = SSEParser()
+            output = []
+            async for line in response.aiter_lines():
+                event = parser.feed(line)
+                if event:
+                    finished, outcome = _apply_stream_event(*event, output)
+                    if finished:
+                        return outcome
+
+                if time.monotonic() >= deadline:
+                    return None
+
+            event = parser.flush()
+            if event:
+                return _apply_stream_event(*event, output)[1]
+    except httpx.HTTPError:
+        return None
+
+    return None
+
+
+def _create_prediction(model_name, input_data, headers, wait=None):
+    """
+    POST a new streaming prediction, returning the response.
+
+    With wait, the API holds the request open for up to that many seconds
+    and answers with the finished prediction if it completes in time.
+    """
+    headers = {**headers, "Content-Type": "application/json"}
+    if wait:
+        headers["Prefer"] = f"wait={wait}"
+
+    return SESSION.post(
+        PREDICTIONS_URL,
+        headers=headers,
+        data=dump_json({"version": model_name, "input": input_data, "stream": True}),
+        # The server may hold the response for the whole wait
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT + (wait or 0))
+    )
+
+
+async def _create_prediction_async(model_name, input_data, headers, wait=None):
+    """Async counterpart of _create_prediction"""
+    if not USE_HTTPX:
+        return await asyncio.to_thread(_create_prediction, model_name, input_data, headers, wait)
+
+    headers = {**headers, "Content-Type": "application/json"}
+    if wait:
+        headers["Prefer"] = f"wait={wait}"
+
+    return await get_async_client().post(
+        PREDICTIONS_URL,
+        headers=headers,
+        content=dump_json({"version": model_name, "input": input_data, "stream": True})
+    )
+
+
+def _prepare_status_request(prediction_id, headers):
+    """
+    Prepare the status GET for a prediction once so every poll can resend it
+    without rebuilding the URL and merging headers again.
+
+    Returns the prepared request and the keyword arguments to send it with.
+    Session.send skips the environment lookup Session.request does, so
+    proxy and CA bundle settings (REQUESTS_CA_BUNDLE etc.) are merged here.
+    """
+    request = SESSION.prepare_request(requests.Request("GET", f"{PREDICTIONS_URL}/{prediction_id}", headers=headers))
+    settings = SESSION.merge_environment_settings(request.url, {}, None, None, None)
+    return request, {**settings, "timeout": REQUEST_TIMEOUT}
+
+
+def _cancel_prediction(prediction_id, headers):
+    """Ask Replicate to stop a prediction we no longer need, ignoring failures"""
+    try:
+        SESSION.post(f"{PREDICTIONS_URL}/{prediction_id}/cancel", headers=headers, timeout=CANCEL_TIMEOUT)
+    except requests.RequestException:
+        pass
+
+
+def _poll_prediction(prediction_id, headers, deadline):
+    """Poll a prediction with backoff until it finishes or the deadline passes"""
+    status_request, send_kwargs = _prepare_status_request(prediction_id, headers)
+    delays = _poll_delays()
+
+    while time.monotonic() < deadline:
+        status_response = SESSION.send(status_request, **send_kwargs)
+
+        if status_response.status_code == 200:
+            outcome = _prediction_outcome(parse_json(status_response))
+            if outcome:
+                return outcome
+
+        time.sleep(next(delays))
+
+    return 'timeout', None
+
+
+async def _poll_prediction_async(prediction_id, headers, deadline):
+    """Async counterpart of _poll_prediction"""
+    if USE_HTTPX:
+        client = get_async_client()
+        status_url = f"{PREDICTIONS_URL}/{prediction_id}"
+    else:
+        status_request, send_kwargs = _prepare_status_request(prediction_id, headers)
+    delays = _poll_delays()
+
+    while time.monotonic() < deadline:
+        if USE_HTTPX:
+            status_response = await client.get(status_url, headers=headers)
+        else:
+            status_response = await asyncio.to_thread(SESSION.send, status_request, **send_kwargs)
+
+        if status_response.status_code == 200:
+            outcome = _prediction_outcome(parse_json(status_response))
+            if outcome:
+                return outcome
+
+        await asyncio.sleep(next(delays))
+
+    return 'timeout', None
+
+
+def _execute_prediction(model_name, input_data, headers, max_wait):
+    """
+    Create a prediction and wait for it to finish.
+
+    Short predictions finish within the create request itself (Prefer:
+    wait); longer ones are read from the prediction's event stream when the
+    model offers one, falling back to status polling otherwise. Returns a
+    (status, payload) tuple where status is 'succeeded', 'failed', 'canceled',
+    'timeout' or 'error' (the prediction could not be created).
+
+    max_wait is a hard deadline: a prediction still running when it passes,
+    or when waiting on it fails with an error, is canceled on Replicate
+    rather than left to finish unobserved.
+    """
+    deadline = time.monotonic() + max_wait
+    PREDICTION_RATE_LIMITER.acquire()
+    response = _create_prediction(model_name, input_data, headers, wait=min(PREFER_WAIT, int(max_wait)))
+
+    if response.status_code != 201:
+        return 'error', f"{response.status_code} - {response.text}"
+
+    prediction = parse_json(response)
+    outcome = _prediction_outcome(prediction)
+    if outcome:
+        return outcome
+
+    prediction_id = prediction.get('id')
+    stream_url = (prediction.get('urls') or {}).get('stream')
+    try:
+        if stream_url:
+            outcome = _read_prediction_stream(stream_url, headers, deadline)
+            if outcome:
+                return outcome
+
+        outcome = _poll_prediction(prediction_id, headers, deadline)
+    except Exception:
+        _cancel_prediction(prediction_id, headers)
+        raise
+
+    if outcome[0] == 'timeout':
+        _cancel_prediction(prediction_id, headers)
+    return outcome
+
+
+async def _execute_prediction_async(model_name, input_data, headers, max_wait):
+    """
+    Async counterpart of _execute_prediction.
+
+    HTTP calls run on worker threads through the shared session (or on the
+    shared httpx client when REPLICATE_HTTPX is enabled) and the wait
+    between polls is an asyncio.sleep, so the event loop stays free to
+    drive other predictions while this one is running. The prediction is
+    also canceled if the awaiting task is.
+    """
+    deadline = time.monotonic() + max_wait
+    await PREDICTION_RATE_LIMITER.acquire_async()
+    response = await _create_prediction_async(model_name, input_data, headers, wait=min(PREFER_WAIT, int(max_wait)))
+
+    if response.status_code != 201:
+        return 'error', f"{response.status_code} - {response.text}"
+
+    prediction = parse_json(response)
+    outcome = _prediction_outcome(prediction)
+    if outcome:
+        return outcome
+
+    prediction_id = prediction.get('id')
+    stream_url = (prediction.get('urls') or {}).get('stream')
+    try:
+        if stream_url:
+            outcome = await _read_prediction_stream_async(stream_url, headers, deadline)
+            if outcome:
+                return outcome
+
+        outcome = await _poll_prediction_async(prediction_id, headers, deadline)
+    except asyncio.CancelledError:
+        # Fire and forget: the task is going away, but the prediction
+        # shouldn't keep running (and billing) without anyone to read it.
+        asyncio.get_running_loop().run_in_executor(None, _cancel_prediction, prediction_id, headers)
+        raise
+    except Exception:
+        await asyncio.to_thread(_cancel_prediction, prediction_id, headers)
+        raise
+
+    if outcome[0] == 'timeout':
+        await asyncio.to_thread(_cancel_prediction, prediction_id, headers)
+    return outcome
+
+
+# Predictions currently running, keyed like the response cache, so that
+# concurrent identical requests made with the same token share one
+# prediction instead of each creating (and paying for) their own.
+_INFLIGHT = {}
+_INFLIGHT_SYNC = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _run_replicate_prediction(model_name, input_data, headers, *, max_wait=MAX_WAIT, use_cache=True):
+    """
+    Run a prediction, serving repeated identical requests from the response
+    cache. Only successful output is cached; use_cache=False bypasses it.
+
+    A caller that misses the cache while an identical prediction is already
+    running waits for that prediction's outcome rather than starting another.
+    """
+    if not use_cache:
+        return _execute_prediction(model_name, input_data, headers, max_wait)
+
+    key = cache_key(headers["Authorization"], model_name, input_data)
+    cached = get_cached_output(key)
+    if cached is not None:
+        return 'succeeded', cached
+
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT_SYNC.get(key)
+        if future is not None:
+            leader = False
+        else:
+            leader = True
+            future = _INFLIGHT_SYNC[key] = Future()
+
+    if not leader:
+        return future.result()
+
+    try:
+        outcome = _execute_prediction(model_name, input_data, headers, max_wait)
+        if outcome[0] == 'succeeded':
+            store_output(key, outcome[1])
+        future.set_result(outcome)
+        return outcome
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            del _INFLIGHT_SYNC[key]
+
+
+async def _run_replicate_prediction_async(model_name, input_data, headers, *, max_wait=MAX_WAIT, use_cache=True):
+    """Async counterpart of _run_replicate_prediction"""
+    if not use_cache:
+        return await _execute_prediction_async(model_name, input_data, headers, max_wait)
+
+    key = cache_key(headers["Authorization"], model_name, input_data)
+    # The disk cache layer is blocking SQLite I/O; keep it off the event loop
+    cached = await asyncio.to_thread(get_cached_output, key)
+    if cached is not None:
+        return 'succeeded', cached
+
+    # asyncio futures belong to one event loop, so coalesce per loop
+    loop = asyncio.get_running_loop()
+    inflight_key = (loop, key)
+    while (future := _INFLIGHT.get(inflight_key)) is not None:
+        try:
+            # Shielded so a waiter being cancelled doesn't cancel the
+            # shared future out from under the caller running it
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The caller running the prediction was cancelled; take over
+
+    future = _INFLIGHT[inflight_key] = loop.create_future()
+    try:
+        outcome = await _execute_prediction_async(model_name, input_data, headers, max_wait)
+        if outcome[0] == 'succeeded':
+            await asyncio.to_thread(store_output, key, outcome[1])
+        future.set_result(outcome)
+        return outcome
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception retrieved so a failure nobody else was waiting
+        # on isn't reported as "never retrieved" when the future is freed.
+        future.exception()
+        raise
+    finally:
+        del _INFLIGHT[inflight_key]
+
+
+def _format_outcome(outcome, task, render, *render_args):
+    """
+    Turn a prediction outcome into the tool's response text.
+
+    Successful output is passed to render(output, *render_args); failures,
+    timeouts and creation errors get the shared "<task> ..." messages.
+    """
+    status, payload = outcome
+
+    if status == 'succeeded':
+        return render(payload, *render_args)
+    elif status == 'failed':
+        return f"{task} failed: {payload}"
+    elif status == 'canceled':
+        return f"{task} was canceled"
+    elif status == 'timeout':
+        return f"{task} timed out after {MAX_WAIT // 60} minutes"
+    return f"Error creating prediction: {payload}"
 
 
 class GenerateCodeInput(BaseModel):
@@ -38,114 +600,79 @@ class GenerateCodeInput(BaseModel):
     model: Optional[str] = Field(None, description="Specific model to use (optional)")
     max_tokens: Optional[int] = Field(2000, description="Maximum tokens in response")
     temperature: Optional[float] = Field(0.7, description="Temperature for generation (0.0-1.0)")
+    disable_cache: Optional[bool] = Field(False, description="Skip the response cache and always run a new prediction")
+
+
+def _build_generate_prediction(prompt, language, model, max_tokens, temperature, *,
+                               default_model=DEFAULT_CODE_MODELS["code_generation"]):
+    """Build the model name and prediction input for a code generation request"""
+    # Use default model if none specified
+    model_name = model or default_model
+
+    # Construct the generation prompt
+    system_prompt = _GENERATE_PROMPT_TEMPLATE.format(language=language, prompt=prompt)
 
+    input_data = {
+        "prompt": system_prompt,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "top_p": 0.9,
+        "repetition_penalty": 1.1
+    }
+    return model_name, input_data
 
+
+def _format_generated_code(output, language, model_name):
+    """Render generated code as the tool response"""
+    return (
+        f"Generated {language} code:\n\n"
+        f"```{language}\n{output}\n```\n\n"
+        f"Model used: {model_name}\n"
+        "Generation completed successfully!"
+    )
+
+
+@memoize_tool
 def generate_code_replicate(name, description, token):
     """Generate code using Replicate AI models"""
     tool_description = description or "Generate code using AI models on Replicate"
+    headers = _build_headers(token)
 
     def generate_code(
         prompt: str,
         language: Optional[str] = "python",
         model: Optional[str] = None,
         max_tokens: Optional[int] = 2000,
-        temperature: Optional[float] = 0.7
+        temperature: Optional[float] = 0.7,
+        disable_cache: Optional[bool] = False
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            # Use default model if none specified
-            model_name = model or DEFAULT_CODE_MODELS["code_generation"]
-            
-            # Construct the generation prompt
-            system_prompt = f"""You are an expert {language} programmer. Generate clean, efficient, and well-documented code based on the following requirements:
-
-Requirements: {prompt}
+            model_name, input_data = _build_generate_prediction(prompt, language, model, max_tokens, temperature)
+            outcome = _run_replicate_prediction(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code generation", _format_generated_code, language, model_name)
 
-Please provide:
-1. Clean, readable code
-2. Appropriate comments
-3. Error handling where necessary
-4. Best practices for {language}
+        except Exception as e:
+            return f"Failed to generate code: {str(e)}"
+
+    async def agenerate_code(
+        prompt: str,
+        language: Optional[str] = "python",
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = 2000,
+        temperature: Optional[float] = 0.7,
+        disable_cache: Optional[bool] = False
+    ) -> str:
+        try:
+            model_name, input_data = _build_generate_prediction(prompt, language, model, max_tokens, temperature)
+            outcome = await _run_replicate_prediction_async(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code generation", _format_generated_code, language, model_name)
 
-Generate only the code, no additional explanations unless specifically requested."""
-
-            input_data = {
-                "prompt": system_prompt,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "top_p": 0.9,
-                "repetition_penalty": 1.1
-            }
-            
-            # Create prediction
-            prediction_data = {
-                "version": model_name,
-                "input": input_data
-            }
-            
-            response = requests.post(
-                "https://api.replicate.com/v1/predictions",
-                headers=headers,
-                json=prediction_data
-            )
-            
-            if response.status_code == 201:
-                prediction = response.json()
-                prediction_id = prediction.get('id')
-                
-                # Poll for completion
-                max_wait = 300  # 5 minutes
-                poll_interval = 5
-                start_time = time.time()
-                
-                while time.time() - start_time < max_wait:
-                    status_response = requests.get(
-                        f"https://api.replicate.com/v1/predictions/{prediction_id}",
-                        headers=headers
-                    )
-                    
-                    if status_response.status_code == 200:
-                        status_data = status_response.json()
-                        status = status_data.get('status')
-                        
-                        if status == 'succeeded':
-                            output = status_data.get('output')
-                            if isinstance(output, list):
-                                generated_code = ''.join(output)
-                            else:
-                                generated_code = str(output)
-                            
-                            result = f"Generated {language} code:\n\n"
-                            result += f"```{language}\n{generated_code}\n```\n\n"
-                            result += f"Model used: {model_name}\n"
-                            result += f"Generation completed successfully!"
-                            return result
-                        
-                        elif status == 'failed':
-                            error = status_data.get('error', 'Unknown error')
-                            return f"Code generation failed: {error}"
-                        
-                        elif status in ['starting', 'processing']:
-                            time.sleep(poll_interval)
-                            continue
-                    
-                    time.sleep(poll_interval)
-                
-                return "Code generation timed out after 5 minutes"
-            else:
-                return f"Error creating prediction: {response.status_code} - {response.text}"
-                
         except Exception as e:
             return f"Failed to generate code: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=generate_code,
+        coroutine=agenerate_code,
         name=name,
         description=tool_description,
         args_schema=GenerateCodeInput,
@@ -153,118 +680,168 @@ Generate only the code, no additional explanations unless specifically requested
     )
 
 
+# Maximum number of batch predictions in flight at once
+BATCH_CONCURRENCY = 10
+
+
+class GenerateCodeBatchInput(BaseModel):
+    prompts: List[str] = Field(description="Descriptions of the code to generate, one snippet per prompt")
+    language: Optional[str] = Field("python", description="Programming language (default: python)")
+    model: Optional[str] = Field(None, description="Specific model to use (optional)")
+    max_tokens: Optional[int] = Field(2000, description="Maximum tokens in each response")
+    temperature: Optional[float] = Field(0.7, description="Temperature for generation (0.0-1.0)")
+    disable_cache: Optional[bool] = Field(False, description="Skip the response cache and always run new predictions")
+
+
+def _format_batch_results(prompts, results):
+    """Join the per-prompt results of a batch into one response"""
+    sections = [f"Generated {len(results)} code snippets:"]
+    for index, (prompt, result) in enumerate(zip(prompts, results), 1):
+        sections.append(f"### Task {index}: {prompt}\n\n{result}")
+    return "\n\n".join(sections)
+
+
+@memoize_tool
+def generate_code_batch_replicate(name, description, token):
+    """Generate code for several prompts concurrently using Replicate AI models"""
+    tool_description = description or "Generate code for several prompts at once using AI models on Replicate"
+    headers = _build_headers(token)
+
+    def generate_code_batch(
+        prompts: List[str],
+        language: Optional[str] = "python",
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = 2000,
+        temperature: Optional[float] = 0.7,
+        disable_cache: Optional[bool] = False
+    ) -> str:
+        try:
+            def generate_one(prompt):
+                try:
+                    model_name, input_data = _build_generate_prediction(prompt, language, model, max_tokens, temperature)
+                    outcome = _run_replicate_prediction(model_name, input_data, headers, use_cache=not disable_cache)
+                    return _format_outcome(outcome, "Code generation", _format_generated_code, language, model_name)
+                except Exception as e:
+                    return f"Failed to generate code: {str(e)}"
+
+            with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as executor:
+                results = list(executor.map(generate_one, prompts))
+            return _format_batch_results(prompts, results)
+
+        except Exception as e:
+            return f"Failed to generate code batch: {str(e)}"
+
+    async def agenerate_code_batch(
+        prompts: List[str],
+        language: Optional[str] = "python",
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = 2000,
+        temperature: Optional[float] = 0.7,
+        disable_cache: Optional[bool] = False
+    ) -> str:
+        try:
+            semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+            async def generate_one(prompt):
+                try:
+                    model_name, input_data = _build_generate_prediction(prompt, language, model, max_tokens, temperature)
+                    async with semaphore:
+                        outcome = await _run_replicate_prediction_async(model_name, input_data, headers, use_cache=not disable_cache)
+                    return _format_outcome(outcome, "Code generation", _format_generated_code, language, model_name)
+                except Exception as e:
+                    return f"Failed to generate code: {str(e)}"
+
+            results = await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
+            return _format_batch_results(prompts, results)
+
+        except Exception as e:
+            return f"Failed to generate code batch: {str(e)}"
+
+    return structured_tool().from_function(
+        func=generate_code_batch,
+        coroutine=agenerate_code_batch,
+        name=name,
+        description=tool_description,
+        args_schema=GenerateCodeBatchInput,
+        return_direct=True
+    )
+
+
 class OptimizeCodeInput(BaseModel):
     code: str = Field(description="Code to optimize")
     language: Optional[str] = Field("python", description="Programming language")
     optimization_focus: Optional[str] = Field("performance", description="Focus: performance, readability, memory, or security")
     model: Optional[str] = Field(None, description="Specific model to use")
+    disable_cache: Optional[bool] = Field(False, description="Skip the response cache and always run a new prediction")
+
+
+def _build_optimize_prediction(code, language, optimization_focus, model, *,
+                               default_model=DEFAULT_CODE_MODELS["code_optimization"]):
+    """Build the model name and prediction input for an optimization request"""
+    model_name = model or default_model
+
+    system_prompt = _OPTIMIZE_PROMPT_TEMPLATE.format(
+        language=language, code=code, optimization_focus=optimization_focus
+    )
 
+    input_data = {
+        "prompt": system_prompt,
+        "max_tokens": 3000,
+        "temperature": 0.3,
+        "top_p": 0.9
+    }
+    return model_name, input_data
 
+
+def _format_optimized_code(output, optimization_focus, model_name):
+    """Render optimization results as the tool response"""
+    return (
+        f"Code Optimization Results ({optimization_focus}):\n\n"
+        f"{output}\n\n"
+        f"Model used: {model_name}\n"
+        "Optimization completed successfully!"
+    )
+
+
+@memoize_tool
 def optimize_code_replicate(name, description, token):
     """Optimize code using Replicate AI models"""
     tool_description = description or "Optimize code for performance, readability, or other aspects using AI"
+    headers = _build_headers(token)
 
     def optimize_code(
         code: str,
         language: Optional[str] = "python",
         optimization_focus: Optional[str] = "performance",
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        disable_cache: Optional[bool] = False
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            model_name = model or DEFAULT_CODE_MODELS["code_optimization"]
-            
-            system_prompt = f"""You are an expert {language} programmer specializing in code optimization. 
-Analyze the following code and optimize it for {optimization_focus}.
+            model_name, input_data = _build_optimize_prediction(code, language, optimization_focus, model)
+            outcome = _run_replicate_prediction(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code optimization", _format_optimized_code, optimization_focus, model_name)
 
-Original code:
-```{language}
-{code}
-```
+        except Exception as e:
+            return f"Failed to optimize code: {str(e)}"
 
-Please provide:
-1. Optimized version of the code
-2. Explanation of changes made
-3. Performance/improvement benefits
-4. Any trade-offs or considerations
+    async def aoptimize_code(
+        code: str,
+        language: Optional[str] = "python",
+        optimization_focus: Optional[str] = "performance",
+        model: Optional[str] = None,
+        disable_cache: Optional[bool] = False
+    ) -> str:
+        try:
+            model_name, input_data = _build_optimize_prediction(code, language, optimization_focus, model)
+            outcome = await _run_replicate_prediction_async(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code optimization", _format_optimized_code, optimization_focus, model_name)
 
-Focus on: {optimization_focus}"""
-
-            input_data = {
-                "prompt": system_prompt,
-                "max_tokens": 3000,
-                "temperature": 0.3,
-                "top_p": 0.9
-            }
-            
-            prediction_data = {
-                "version": model_name,
-                "input": input_data
-            }
-            
-            response = requests.post(
-                "https://api.replicate.com/v1/predictions",
-                headers=headers,
-                json=prediction_data
-            )
-            
-            if response.status_code == 201:
-                prediction = response.json()
-                prediction_id = prediction.get('id')
-                
-                # Poll for completion
-                max_wait = 300
-                poll_interval = 5
-                start_time = time.time()
-                
-                while time.time() - start_time < max_wait:
-                    status_response = requests.get(
-                        f"https://api.replicate.com/v1/predictions/{prediction_id}",
-                        headers=headers
-                    )
-                    
-                    if status_response.status_code == 200:
-                        status_data = status_response.json()
-                        status = status_data.get('status')
-                        
-                        if status == 'succeeded':
-                            output = status_data.get('output')
-                            if isinstance(output, list):
-                                optimization_result = ''.join(output)
-                            else:
-                                optimization_result = str(output)
-                            
-                            result = f"Code Optimization Results ({optimization_focus}):\n\n"
-                            result += f"{optimization_result}\n\n"
-                            result += f"Model used: {model_name}\n"
-                            result += f"Optimization completed successfully!"
-                            return result
-                        
-                        elif status == 'failed':
-                            error = status_data.get('error', 'Unknown error')
-                            return f"Code optimization failed: {error}"
-                        
-                        elif status in ['starting', 'processing']:
-                            time.sleep(poll_interval)
-                            continue
-                    
-                    time.sleep(poll_interval)
-                
-                return "Code optimization timed out after 5 minutes"
-            else:
-                return f"Error creating prediction: {response.status_code} - {response.text}"
-                
         except Exception as e:
             return f"Failed to optimize code: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=optimize_code,
+        coroutine=aoptimize_code,
         name=name,
         description=tool_description,
         args_schema=OptimizeCodeInput,
@@ -277,116 +854,78 @@ class DebugCodeInput(BaseModel):
     error_message: Optional[str] = Field(None, description="Error message or description of the issue")
     language: Optional[str] = Field("python", description="Programming language")
     model: Optional[str] = Field(None, description="Specific model to use")
+    disable_cache: Optional[bool] = Field(False, description="Skip the response cache and always run a new prediction")
+
+
+def _build_debug_prediction(code, error_message, language, model, *,
+                            default_model=DEFAULT_CODE_MODELS["code_debugging"]):
+    """Build the model name and prediction input for a debugging request"""
+    model_name = model or default_model
 
+    error_context = f"\nError message: {error_message}" if error_message else ""
 
+    system_prompt = _DEBUG_PROMPT_TEMPLATE.format(
+        language=language, code=code, error_context=error_context
+    )
+
+    input_data = {
+        "prompt": system_prompt,
+        "max_tokens": 3000,
+        "temperature": 0.2,
+        "top_p": 0.9
+    }
+    return model_name, input_data
+
+
+def _format_debug_analysis(output, model_name):
+    """Render a debug analysis as the tool response"""
+    return (
+        "Code Debug Analysis:\n\n"
+        f"{output}\n\n"
+        f"Model used: {model_name}\n"
+        "Debug analysis completed successfully!"
+    )
+
+
+@memoize_tool
 def debug_code_replicate(name, description, token):
     """Debug code using Replicate AI models"""
     tool_description = description or "Debug code and find solutions to errors using AI"
+    headers = _build_headers(token)
 
     def debug_code(
         code: str,
         error_message: Optional[str] = None,
         language: Optional[str] = "python",
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        disable_cache: Optional[bool] = False
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            model_name = model or DEFAULT_CODE_MODELS["code_debugging"]
-            
-            error_context = f"\nError message: {error_message}" if error_message else ""
-            
-            system_prompt = f"""You are an expert {language} programmer and debugger. 
-Analyze the following code and identify issues, bugs, or potential problems.
+            model_name, input_data = _build_debug_prediction(code, error_message, language, model)
+            outcome = _run_replicate_prediction(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code debugging", _format_debug_analysis, model_name)
 
-Code to debug:
-```{language}
-{code}
-```{error_context}
+        except Exception as e:
+            return f"Failed to debug code: {str(e)}"
 
-Please provide:
-1. Identification of issues/bugs
-2. Corrected version of the code
-3. Explanation of what was wrong
-4. Best practices to avoid similar issues
-5. Testing suggestions
+    async def adebug_code(
+        code: str,
+        error_message: Optional[str] = None,
+        language: Optional[str] = "python",
+        model: Optional[str] = None,
+        disable_cache: Optional[bool] = False
+    ) -> str:
+        try:
+            model_name, input_data = _build_debug_prediction(code, error_message, language, model)
+            outcome = await _run_replicate_prediction_async(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code debugging", _format_debug_analysis, model_name)
 
-Be thorough and provide working solutions."""
-
-            input_data = {
-                "prompt": system_prompt,
-                "max_tokens": 3000,
-                "temperature": 0.2,
-                "top_p": 0.9
-            }
-            
-            prediction_data = {
-                "version": model_name,
-                "input": input_data
-            }
-            
-            response = requests.post(
-                "https://api.replicate.com/v1/predictions",
-                headers=headers,
-                json=prediction_data
-            )
-            
-            if response.status_code == 201:
-                prediction = response.json()
-                prediction_id = prediction.get('id')
-                
-                # Poll for completion
-                max_wait = 300
-                poll_interval = 5
-                start_time = time.time()
-                
-                while time.time() - start_time < max_wait:
-                    status_response = requests.get(
-                        f"https://api.replicate.com/v1/predictions/{prediction_id}",
-                        headers=headers
-                    )
-                    
-                    if status_response.status_code == 200:
-                        status_data = status_response.json()
-                        status = status_data.get('status')
-                        
-                        if status == 'succeeded':
-                            output = status_data.get('output')
-                            if isinstance(output, list):
-                                debug_result = ''.join(output)
-                            else:
-                                debug_result = str(output)
-                            
-                            result = f"Code Debug Analysis:\n\n"
-                            result += f"{debug_result}\n\n"
-                            result += f"Model used: {model_name}\n"
-                            result += f"Debug analysis completed successfully!"
-                            return result
-                        
-                        elif status == 'failed':
-                            error = status_data.get('error', 'Unknown error')
-                            return f"Code debugging failed: {error}"
-                        
-                        elif status in ['starting', 'processing']:
-                            time.sleep(poll_interval)
-                            continue
-                    
-                    time.sleep(poll_interval)
-                
-                return "Code debugging timed out after 5 minutes"
-            else:
-                return f"Error creating prediction: {response.status_code} - {response.text}"
-                
         except Exception as e:
             return f"Failed to debug code: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=debug_code,
+        coroutine=adebug_code,
         name=name,
         description=tool_description,
         args_schema=DebugCodeInput,
@@ -399,126 +938,78 @@ class ExplainCodeInput(BaseModel):
     language: Optional[str] = Field("python", description="Programming language")
     detail_level: Optional[str] = Field("medium", description="Detail level: basic, medium, or detailed")
     model: Optional[str] = Field(None, description="Specific model to use")
+    disable_cache: Optional[bool] = Field(False, description="Skip the response cache and always run a new prediction")
+
+
+def _build_explain_prediction(code, language, detail_level, model, *,
+                              default_model=DEFAULT_CODE_MODELS["code_explanation"]):
+    """Build the model name and prediction input for an explanation request"""
+    model_name = model or default_model
+
+    instruction = EXPLANATION_DETAIL_INSTRUCTIONS.get(detail_level, EXPLANATION_DETAIL_INSTRUCTIONS["medium"])
+
+    system_prompt = _EXPLAIN_PROMPT_TEMPLATE.format(
+        language=language, code=code, instruction=instruction
+    )
+
+    input_data = {
+        "prompt": system_prompt,
+        "max_tokens": 3000,
+        "temperature": 0.3,
+        "top_p": 0.9
+    }
+    return model_name, input_data
+
+
+def _format_explanation(output, detail_level, model_name):
+    """Render a code explanation as the tool response"""
+    return (
+        f"Code Explanation ({detail_level} level):\n\n"
+        f"{output}\n\n"
+        f"Model used: {model_name}\n"
+        "Explanation completed successfully!"
+    )
 
 
+@memoize_tool
 def explain_code_replicate(name, description, token):
     """Explain code using Replicate AI models"""
     tool_description = description or "Get detailed explanations of code functionality using AI"
+    headers = _build_headers(token)
 
     def explain_code(
         code: str,
         language: Optional[str] = "python",
         detail_level: Optional[str] = "medium",
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        disable_cache: Optional[bool] = False
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            model_name = model or DEFAULT_CODE_MODELS["code_explanation"]
-            
-            detail_instructions = {
-                "basic": "Provide a brief, high-level explanation suitable for beginners",
-                "medium": "Provide a detailed explanation with examples and context",
-                "detailed": "Provide a comprehensive explanation with technical details, complexity analysis, and best practices"
-            }
-            
-            instruction = detail_instructions.get(detail_level, detail_instructions["medium"])
-            
-            system_prompt = f"""You are an expert {language} programmer and teacher. 
-Explain the following code in a clear and educational manner.
+            model_name, input_data = _build_explain_prediction(code, language, detail_level, model)
+            outcome = _run_replicate_prediction(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code explanation", _format_explanation, detail_level, model_name)
 
-Code to explain:
-```{language}
-{code}
-```
-
-Instructions: {instruction}
+        except Exception as e:
+            return f"Failed to explain code: {str(e)}"
 
-Please provide:
-1. Overall purpose and functionality
-2. Step-by-step breakdown
-3. Key concepts and techniques used
-4. Input/output behavior
-5. Time/space complexity (if applicable)
-6. Potential use cases
-7. Related concepts or improvements
+    async def aexplain_code(
+        code: str,
+        language: Optional[str] = "python",
+        detail_level: Optional[str] = "medium",
+        model: Optional[str] = None,
+        disable_cache: Optional[bool] = False
+    ) -> str:
+        try:
+            model_name, input_data = _build_explain_prediction(code, language, detail_level, model)
+            outcome = await _run_replicate_prediction_async(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code explanation", _format_explanation, detail_level, model_name)
 
-Make it educational and easy to understand."""
-
-            input_data = {
-                "prompt": system_prompt,
-                "max_tokens": 3000,
-                "temperature": 0.3,
-                "top_p": 0.9
-            }
-            
-            prediction_data = {
-                "version": model_name,
-                "input": input_data
-            }
-            
-            response = requests.post(
-                "https://api.replicate.com/v1/predictions",
-                headers=headers,
-                json=prediction_data
-            )
-            
-            if response.status_code == 201:
-                prediction = response.json()
-                prediction_id = prediction.get('id')
-                
-                # Poll for completion
-                max_wait = 300
-                poll_interval = 5
-                start_time = time.time()
-                
-                while time.time() - start_time < max_wait:
-                    status_response = requests.get(
-                        f"https://api.replicate.com/v1/predictions/{prediction_id}",
-                        headers=headers
-                    )
-                    
-                    if status_response.status_code == 200:
-                        status_data = status_response.json()
-                        status = status_data.get('status')
-                        
-                        if status == 'succeeded':
-                            output = status_data.get('output')
-                            if isinstance(output, list):
-                                explanation = ''.join(output)
-                            else:
-                                explanation = str(output)
-                            
-                            result = f"Code Explanation ({detail_level} level):\n\n"
-                            result += f"{explanation}\n\n"
-                            result += f"Model used: {model_name}\n"
-                            result += f"Explanation completed successfully!"
-                            return result
-                        
-                        elif status == 'failed':
-                            error = status_data.get('error', 'Unknown error')
-                            return f"Code explanation failed: {error}"
-                        
-                        elif status in ['starting', 'processing']:
-                            time.sleep(poll_interval)
-                            continue
-                    
-                    time.sleep(poll_interval)
-                
-                return "Code explanation timed out after 5 minutes"
-            else:
-                return f"Error creating prediction: {response.status_code} - {response.text}"
-                
         except Exception as e:
             return f"Failed to explain code: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=explain_code,
+        coroutine=aexplain_code,
         name=name,
         description=tool_description,
         args_schema=ExplainCodeInput,
@@ -532,126 +1023,163 @@ class ConvertCodeInput(BaseModel):
     target_language: str = Field(description="Target programming language")
     model: Optional[str] = Field(None, description="Specific model to use")
     preserve_comments: Optional[bool] = Field(True, description="Whether to preserve comments")
+    disable_cache: Optional[bool] = Field(False, description="Skip the response cache and always run a new prediction")
+
 
+def _build_convert_prediction(code, source_language, target_language, model, preserve_comments, *,
+                              default_model=DEFAULT_CODE_MODELS["code_conversion"]):
+    """Build the model name and prediction input for a conversion request"""
+    model_name = model or default_model
 
+    system_prompt = _CONVERT_PROMPT_TEMPLATE.format(
+        source_language=source_language, target_language=target_language,
+        code=code, comment_instruction=COMMENT_INSTRUCTIONS[bool(preserve_comments)]
+    )
+
+    input_data = {
+        "prompt": system_prompt,
+        "max_tokens": 3000,
+        "temperature": 0.2,
+        "top_p": 0.9
+    }
+    return model_name, input_data
+
+
+def _format_converted_code(output, source_language, target_language, model_name):
+    """Render converted code as the tool response"""
+    return (
+        f"Code Conversion ({source_language} → {target_language}):\n\n"
+        f"{output}\n\n"
+        f"Model used: {model_name}\n"
+        "Conversion completed successfully!"
+    )
+
+
+@memoize_tool
 def convert_code_replicate(name, description, token):
     """Convert code between programming languages using Replicate AI models"""
     tool_description = description or "Convert code from one programming language to another using AI"
+    headers = _build_headers(token)
 
     def convert_code(
         code: str,
         source_language: str,
         target_language: str,
         model: Optional[str] = None,
-        preserve_comments: Optional[bool] = True
+        preserve_comments: Optional[bool] = True,
+        disable_cache: Optional[bool] = False
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            model_name = model or DEFAULT_CODE_MODELS["code_conversion"]
-            
-            comment_instruction = "Preserve and convert comments appropriately" if preserve_comments else "Focus on code conversion, comments optional"
-            
-            system_prompt = f"""You are an expert programmer fluent in multiple programming languages. 
-Convert the following {source_language} code to {target_language}.
+            model_name, input_data = _build_convert_prediction(code, source_language, target_language, model, preserve_comments)
+            outcome = _run_replicate_prediction(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code conversion", _format_converted_code, source_language, target_language, model_name)
 
-Source code ({source_language}):
-```{source_language}
-{code}
-```
-
-Instructions:
-1. Convert the code to idiomatic {target_language}
-2. Maintain the same functionality and logic
-3. Use {target_language} best practices and conventions
-4. {comment_instruction}
-5. Handle language-specific features appropriately
-6. Provide equivalent libraries/modules where needed
+        except Exception as e:
+            return f"Failed to convert code: {str(e)}"
 
-Please provide:
-1. Converted code
-2. Notes about any significant changes or considerations
-3. Required imports/dependencies for {target_language}
-4. Any limitations or differences in behavior
+    async def aconvert_code(
+        code: str,
+        source_language: str,
+        target_language: str,
+        model: Optional[str] = None,
+        preserve_comments: Optional[bool] = True,
+        disable_cache: Optional[bool] = False
+    ) -> str:
+        try:
+            model_name, input_data = _build_convert_prediction(code, source_language, target_language, model, preserve_comments)
+            outcome = await _run_replicate_prediction_async(model_name, input_data, headers, use_cache=not disable_cache)
+            return _format_outcome(outcome, "Code conversion", _format_converted_code, source_language, target_language, model_name)
 
-Make sure the converted code is functional and follows {target_language} standards."""
-
-            input_data = {
-                "prompt": system_prompt,
-                "max_tokens": 3000,
-                "temperature": 0.2,
-                "top_p": 0.9
-            }
-            
-            prediction_data = {
-                "version": model_name,
-                "input": input_data
-            }
-            
-            response = requests.post(
-                "https://api.replicate.com/v1/predictions",
-                headers=headers,
-                json=prediction_data
-            )
-            
-            if response.status_code == 201:
-                prediction = response.json()
-                prediction_id = prediction.get('id')
-                
-                # Poll for completion
-                max_wait = 300
-                poll_interval = 5
-                start_time = time.time()
-                
-                while time.time() - start_time < max_wait:
-                    status_response = requests.get(
-                        f"https://api.replicate.com/v1/predictions/{prediction_id}",
-                        headers=headers
-                    )
-                    
-                    if status_response.status_code == 200:
-                        status_data = status_response.json()
-                        status = status_data.get('status')
-                        
-                        if status == 'succeeded':
-                            output = status_data.get('output')
-                            if isinstance(output, list):
-                                conversion_result = ''.join(output)
-                            else:
-                                conversion_result = str(output)
-                            
-                            result = f"Code Conversion ({source_language} → {target_language}):\n\n"
-                            result += f"{conversion_result}\n\n"
-                            result += f"Model used: {model_name}\n"
-                            result += f"Conversion completed successfully!"
-                            return result
-                        
-                        elif status == 'failed':
-                            error = status_data.get('error', 'Unknown error')
-                            return f"Code conversion failed: {error}"
-                        
-                        elif status in ['starting', 'processing']:
-                            time.sleep(poll_interval)
-                            continue
-                    
-                    time.sleep(poll_interval)
-                
-                return "Code conversion timed out after 5 minutes"
-            else:
-                return f"Error creating prediction: {response.status_code} - {response.text}"
-                
         except Exception as e:
             return f"Failed to convert code: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=convert_code,
+        coroutine=aconvert_code,
         name=name,
         description=tool_description,
         args_schema=ConvertCodeInput,
         return_direct=True
-    )
\ No newline at end of file
+    )
+
+
+# Task kinds accepted by run_many_replicate and the tool factory for each
+TASK_FACTORIES = MappingProxyType({
+    "generate": generate_code_replicate,
+    "optimize": optimize_code_replicate,
+    "debug": debug_code_replicate,
+    "explain": explain_code_replicate,
+    "convert": convert_code_replicate
+})
+
+
+class RunManyInput(BaseModel):
+    tasks: List[Dict[str, Any]] = Field(
+        description="Tasks to run, each a 'kind' (generate, optimize, debug, explain or convert) plus that tool's arguments"
+    )
+
+
+def _format_task_results(tasks, results):
+    """Join the per-task results of a fanout into one response"""
+    sections = [f"Completed {len(results)} tasks:"]
+    for index, (task, result) in enumerate(zip(tasks, results), 1):
+        sections.append(f"### Task {index} ({task.get('kind')})\n\n{result}")
+    return "\n\n".join(sections)
+
+
+@memoize_tool
+def run_many_replicate(name, description, token):
+    """Run several code tasks of different kinds concurrently using Replicate AI models"""
+    tool_description = description or "Run several code generation, optimization, debugging, explanation or conversion tasks at once using AI"
+
+    def task_tool(task):
+        """Split a task into its tool and arguments"""
+        arguments = dict(task)
+        kind = arguments.pop("kind", None)
+        factory = TASK_FACTORIES.get(kind)
+        if factory is None:
+            raise ValueError(f"Unknown task kind {kind!r}, expected one of {', '.join(TASK_FACTORIES)}")
+        return factory(f"{name}_{kind}", None, token), arguments
+
+    def run_many(tasks: List[Dict[str, Any]]) -> str:
+        try:
+            def run_one(task):
+                try:
+                    tool, arguments = task_tool(task)
+                    return tool.invoke(arguments)
+                except Exception as e:
+                    return f"Failed to run task: {str(e)}"
+
+            with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as executor:
+                results = list(executor.map(run_one, tasks))
+            return _format_task_results(tasks, results)
+
+        except Exception as e:
+            return f"Failed to run tasks: {str(e)}"
+
+    async def arun_many(tasks: List[Dict[str, Any]]) -> str:
+        try:
+            semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+            async def run_one(task):
+                try:
+                    tool, arguments = task_tool(task)
+                    async with semaphore:
+                        return await tool.ainvoke(arguments)
+                except Exception as e:
+                    return f"Failed to run task: {str(e)}"
+
+            results = await asyncio.gather(*(run_one(task) for task in tasks))
+            return _format_task_results(tasks, results)
+
+        except Exception as e:
+            return f"Failed to run tasks: {str(e)}"
+
+    return structured_tool().from_function(
+        func=run_many,
+        coroutine=arun_many,
+        name=name,
+        description=tool_description,
+        args_schema=RunManyInput,
+        return_direct=True
+    )
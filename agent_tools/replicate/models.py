@@ -5,74 +5,106 @@ This module provides tools for managing Replicate models including listing,
 creating, updating, and deleting models.
 """
 
-from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-import requests
-import json
+from concurrent.futures import ThreadPoolExecutor
 
+from ._cache import ResponseCache
+from ._http import SESSION, REPLICATE_API_BASE, REQUEST_TIMEOUT, api_headers, dump_json, parse_json
+from ._tools import extract_token_from_data, memoize_tool, structured_tool
 
-def extract_token_from_data(token_data):
-    """Extract token from various token formats"""
-    if isinstance(token_data, str):
-        return token_data
-    elif isinstance(token_data, dict):
-        return token_data.get('token') or token_data.get('access_token') or token_data.get('api_key')
-    return str(token_data)
+MODELS_URL = f"{REPLICATE_API_BASE}/models"
+
+# Formatted list/get responses, keyed by token and request, so an agent
+# asking for the same listing or model again within the TTL skips the
+# round trip. Any create, update or delete clears it.
+MODEL_CACHE_TTL = 60
+MODEL_CACHE = ResponseCache(max_entries=256, ttl=MODEL_CACHE_TTL)
+
+# ETag and formatted response of each model fetched, kept well past the
+# TTL above so a re-fetch can be a conditional GET answered with 304
+MODEL_ETAG_TTL = 86400  # 1 day
+MODEL_ETAGS = ResponseCache(max_entries=256, ttl=MODEL_ETAG_TTL)
+
+# Upper bound on pages a single list_models call will follow
+MAX_LIST_PAGES = 10
+
+# Maximum number of model lookups in flight at once for a batch
+MODEL_BATCH_CONCURRENCY = 8
+
+
+def _format_model_listing(models, next_url):
+    """Render a page (or pages) of models as the list tool's response"""
+    parts = [f"Found {len(models)} models:\n\n"]
+    parts.extend(
+        f"• {model.get('owner')}/{model.get('name')}\n"
+        f"  Description: {model.get('description', 'No description')}\n"
+        f"  Visibility: {model.get('visibility', 'unknown')}\n"
+        f"  URL: {model.get('url', 'N/A')}\n\n"
+        for model in models
+    )
+    if next_url:
+        parts.append(f"Next page cursor: {next_url}\n")
+    return "".join(parts)
 
 
 class ListModelsInput(BaseModel):
     cursor: Optional[str] = Field(None, description="Pagination cursor for next page")
-    limit: Optional[int] = Field(20, description="Number of models to return (max 100)")
+    limit: Optional[int] = Field(20, description="Number of models to return per page (max 100)")
+    pages: Optional[int] = Field(1, description=f"Number of pages to fetch, following the next cursor (max {MAX_LIST_PAGES})")
 
 
+@memoize_tool
 def list_replicate_models(name, description, token):
     """List available Replicate models"""
     tool_description = description or "List available Replicate models with pagination support"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token)
 
-    def list_models(cursor: Optional[str] = None, limit: Optional[int] = 20) -> str:
+    def list_models(cursor: Optional[str] = None, limit: Optional[int] = 20, pages: Optional[int] = 1) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
             params = {}
             if cursor:
                 params['cursor'] = cursor
             if limit:
                 params['limit'] = min(limit, 100)  # API limit is 100
             
-            response = requests.get(
-                "https://api.replicate.com/v1/models",
-                headers=headers,
-                params=params
-            )
+            page_count = min(max(pages or 1, 1), MAX_LIST_PAGES)
             
-            if response.status_code == 200:
-                data = response.json()
-                models = data.get('results', [])
-                
-                result = f"Found {len(models)} models:\n\n"
-                for model in models:
-                    result += f"• {model.get('owner')}/{model.get('name')}\n"
-                    result += f"  Description: {model.get('description', 'No description')}\n"
-                    result += f"  Visibility: {model.get('visibility', 'unknown')}\n"
-                    result += f"  URL: {model.get('url', 'N/A')}\n\n"
+            cache_key = (access_token, MODELS_URL, cursor, params.get('limit'), page_count)
+            cached = MODEL_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Each page's next URL already carries its cursor and limit, so
+            # later pages are fetched as-is over the same pooled connection
+            models = []
+            url = MODELS_URL
+            for _ in range(page_count):
+                response = SESSION.get(
+                    url,
+                    headers=headers,
+                    params=params,
+                    timeout=REQUEST_TIMEOUT
+                )
                 
-                if data.get('next'):
-                    result += f"Next page cursor: {data.get('next')}\n"
+                if response.status_code != 200:
+                    return f"Error listing models: {response.status_code} - {response.text}"
                 
-                return result
-            else:
-                return f"Error listing models: {response.status_code} - {response.text}"
+                data = parse_json(response)
+                models.extend(data.get('results', []))
+                url, params = data.get('next'), None
+                if not url:
+                    break
+            
+            result = _format_model_listing(models, url)
+            MODEL_CACHE.set(cache_key, result)
+            return result
                 
         except Exception as e:
             return f"Failed to list Replicate models: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=list_models,
         name=name,
         description=tool_description,
@@ -81,65 +113,97 @@ def list_replicate_models(name, description, token):
     )
 
 
+def _format_model_details(model):
+    """Render a model's details as the get tool's response"""
+    parts = [
+        f"Model: {model.get('owner')}/{model.get('name')}\n"
+        f"Description: {model.get('description', 'No description')}\n"
+        f"Visibility: {model.get('visibility', 'unknown')}\n"
+        f"GitHub URL: {model.get('github_url', 'N/A')}\n"
+        f"Paper URL: {model.get('paper_url', 'N/A')}\n"
+        f"License URL: {model.get('license_url', 'N/A')}\n"
+        f"Cover Image: {model.get('cover_image_url', 'N/A')}\n"
+        f"Default Example: {model.get('default_example', 'N/A')}\n"
+    ]
+
+    # Latest version info
+    latest_version = model.get('latest_version')
+    if latest_version:
+        parts.append(
+            "\nLatest Version:\n"
+            f"  ID: {latest_version.get('id')}\n"
+            f"  Created: {latest_version.get('created_at')}\n"
+            f"  COG Version: {latest_version.get('cog_version')}\n"
+        )
+
+        # Schema info
+        schema = latest_version.get('openapi_schema', {})
+        if schema and schema.get('components', {}):
+            parts.append("  Input Schema: Available\n  Output Schema: Available\n")
+
+    return "".join(parts)
+
+
+def _clear_model_caches():
+    """Forget cached model reads after a write"""
+    MODEL_CACHE.clear()
+    MODEL_ETAGS.clear()
+
+
+def _get_model(model_owner, model_name, access_token, headers):
+    """
+    Fetch one model and render it, serving repeats from MODEL_CACHE.
+
+    Once the cached copy expires the model is re-fetched with If-None-Match,
+    so an unchanged model comes back as an empty 304.
+    """
+    try:
+        model_url = f"{MODELS_URL}/{model_owner}/{model_name}"
+        key = (access_token, model_url)
+        cached = MODEL_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+        validator = MODEL_ETAGS.get(key)
+        response = SESSION.get(
+            model_url,
+            headers={**headers, "If-None-Match": validator[0]} if validator else headers,
+            timeout=REQUEST_TIMEOUT
+        )
+
+        if response.status_code == 304 and validator:
+            MODEL_CACHE.set(key, validator[1])
+            return validator[1]
+        elif response.status_code == 200:
+            result = _format_model_details(parse_json(response))
+            MODEL_CACHE.set(key, result)
+            etag = response.headers.get("ETag")
+            if etag:
+                MODEL_ETAGS.set(key, (etag, result))
+            return result
+        else:
+            return f"Error getting model: {response.status_code} - {response.text}"
+
+    except Exception as e:
+        return f"Failed to get Replicate model: {str(e)}"
+
+
 class GetModelInput(BaseModel):
     model_owner: str = Field(description="Owner of the model")
     model_name: str = Field(description="Name of the model")
 
 
+@memoize_tool
 def get_replicate_model(name, description, token):
     """Get details of a specific Replicate model"""
     tool_description = description or "Get detailed information about a specific Replicate model"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token)
 
     def get_model(model_owner: str, model_name: str) -> str:
-        try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(
-                f"https://api.replicate.com/v1/models/{model_owner}/{model_name}",
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                model = response.json()
-                
-                result = f"Model: {model.get('owner')}/{model.get('name')}\n"
-                result += f"Description: {model.get('description', 'No description')}\n"
-                result += f"Visibility: {model.get('visibility', 'unknown')}\n"
-                result += f"GitHub URL: {model.get('github_url', 'N/A')}\n"
-                result += f"Paper URL: {model.get('paper_url', 'N/A')}\n"
-                result += f"License URL: {model.get('license_url', 'N/A')}\n"
-                result += f"Cover Image: {model.get('cover_image_url', 'N/A')}\n"
-                result += f"Default Example: {model.get('default_example', 'N/A')}\n"
-                
-                # Latest version info
-                latest_version = model.get('latest_version')
-                if latest_version:
-                    result += f"\nLatest Version:\n"
-                    result += f"  ID: {latest_version.get('id')}\n"
-                    result += f"  Created: {latest_version.get('created_at')}\n"
-                    result += f"  COG Version: {latest_version.get('cog_version')}\n"
-                    
-                    # Schema info
-                    schema = latest_version.get('openapi_schema', {})
-                    if schema:
-                        components = schema.get('components', {})
-                        if components:
-                            result += f"  Input Schema: Available\n"
-                            result += f"  Output Schema: Available\n"
-                
-                return result
-            else:
-                return f"Error getting model: {response.status_code} - {response.text}"
-                
-        except Exception as e:
-            return f"Failed to get Replicate model: {str(e)}"
+        return _get_model(model_owner, model_name, access_token, headers)
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=get_model,
         name=name,
         description=tool_description,
@@ -148,6 +212,49 @@ def get_replicate_model(name, description, token):
     )
 
 
+class GetModelsBatchInput(BaseModel):
+    models: List[str] = Field(description="Models to look up, each as 'owner/name'")
+
+
+def _format_model_batch(models, results):
+    """Join the per-model results of a batch lookup into one response"""
+    sections = [f"Details for {len(results)} models:"]
+    for model, result in zip(models, results):
+        sections.append(f"### {model}\n\n{result}")
+    return "\n\n".join(sections)
+
+
+@memoize_tool
+def get_replicate_models_batch(name, description, token):
+    """Get details of several Replicate models concurrently"""
+    tool_description = description or "Get detailed information about several Replicate models at once"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token)
+
+    def get_models(models: List[str]) -> str:
+        try:
+            def get_one(model):
+                model_owner, _, model_name = model.partition('/')
+                if not model_owner or not model_name:
+                    return f"Invalid model reference {model!r}, expected 'owner/name'"
+                return _get_model(model_owner, model_name, access_token, headers)
+
+            with ThreadPoolExecutor(max_workers=MODEL_BATCH_CONCURRENCY) as executor:
+                results = list(executor.map(get_one, models))
+            return _format_model_batch(models, results)
+
+        except Exception as e:
+            return f"Failed to get Replicate models: {str(e)}"
+
+    return structured_tool().from_function(
+        func=get_models,
+        name=name,
+        description=tool_description,
+        args_schema=GetModelsBatchInput,
+        return_direct=True
+    )
+
+
 class CreateModelInput(BaseModel):
     model_name: str = Field(description="Name of the model to create")
     visibility: str = Field(description="Visibility of the model (public or private)")
@@ -159,9 +266,12 @@ class CreateModelInput(BaseModel):
     cover_image_url: Optional[str] = Field(None, description="Cover image URL")
 
 
+@memoize_tool
 def create_replicate_model(name, description, token):
     """Create a new Replicate model"""
     tool_description = description or "Create a new Replicate model with specified configuration"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token, "application/json")
 
     def create_model(
         model_name: str,
@@ -174,13 +284,6 @@ def create_replicate_model(name, description, token):
         cover_image_url: Optional[str] = None
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
             data = {
                 "name": model_name,
                 "visibility": visibility,
@@ -198,14 +301,16 @@ def create_replicate_model(name, description, token):
             if cover_image_url:
                 data["cover_image_url"] = cover_image_url
             
-            response = requests.post(
-                "https://api.replicate.com/v1/models",
+            response = SESSION.post(
+                MODELS_URL,
                 headers=headers,
-                json=data
+                data=dump_json(data),
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 201:
-                model = response.json()
+                _clear_model_caches()
+                model = parse_json(response)
                 result = f"Model created successfully!\n"
                 result += f"Name: {model.get('owner')}/{model.get('name')}\n"
                 result += f"URL: {model.get('url')}\n"
@@ -217,7 +322,7 @@ def create_replicate_model(name, description, token):
         except Exception as e:
             return f"Failed to create Replicate model: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=create_model,
         name=name,
         description=tool_description,
@@ -238,9 +343,12 @@ class UpdateModelInput(BaseModel):
     cover_image_url: Optional[str] = Field(None, description="New cover image URL")
 
 
+@memoize_tool
 def update_replicate_model(name, description, token):
     """Update an existing Replicate model"""
     tool_description = description or "Update an existing Replicate model's configuration"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token, "application/json")
 
     def update_model(
         model_owner: str,
@@ -254,13 +362,6 @@ def update_replicate_model(name, description, token):
         cover_image_url: Optional[str] = None
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
             data = {}
             if visibility:
                 data["visibility"] = visibility
@@ -280,14 +381,16 @@ def update_replicate_model(name, description, token):
             if not data:
                 return "No updates provided. Please specify at least one field to update."
             
-            response = requests.patch(
-                f"https://api.replicate.com/v1/models/{model_owner}/{model_name}",
+            response = SESSION.patch(
+                f"{MODELS_URL}/{model_owner}/{model_name}",
                 headers=headers,
-                json=data
+                data=dump_json(data),
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                model = response.json()
+                _clear_model_caches()
+                model = parse_json(response)
                 result = f"Model updated successfully!\n"
                 result += f"Name: {model.get('owner')}/{model.get('name')}\n"
                 result += f"URL: {model.get('url')}\n"
@@ -299,7 +402,7 @@ def update_replicate_model(name, description, token):
         except Exception as e:
             return f"Failed to update Replicate model: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=update_model,
         name=name,
         description=tool_description,
@@ -313,25 +416,23 @@ class DeleteModelInput(BaseModel):
     model_name: str = Field(description="Name of the model to delete")
 
 
+@memoize_tool
 def delete_replicate_model(name, description, token):
     """Delete a Replicate model"""
     tool_description = description or "Delete a Replicate model permanently"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token)
 
     def delete_model(model_owner: str, model_name: str) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.delete(
-                f"https://api.replicate.com/v1/models/{model_owner}/{model_name}",
-                headers=headers
+            response = SESSION.delete(
+                f"{MODELS_URL}/{model_owner}/{model_name}",
+                headers=headers,
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 204:
+                _clear_model_caches()
                 return f"Model {model_owner}/{model_name} deleted successfully!"
             else:
                 return f"Error deleting model: {response.status_code} - {response.text}"
@@ -339,7 +440,7 @@ def delete_replicate_model(name, description, token):
         except Exception as e:
             return f"Failed to delete Replicate model: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=delete_model,
         name=name,
         description=tool_description,
@@ -4,21 +4,38 @@ Replicate Prediction Management Tools
 This module provides tools for creating, managing, and monitoring Replicate predictions.
 """
 
-from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Union
 import requests
-import json
 import time
 
+from ._http import (
+    SESSION, REPLICATE_API_BASE, CONNECT_TIMEOUT, REQUEST_TIMEOUT, api_headers, dump_json, iter_sse_events,
+    parse_json
+)
+from ._tools import extract_token_from_data, memoize_tool, structured_tool
 
-def extract_token_from_data(token_data):
-    """Extract token from various token formats"""
-    if isinstance(token_data, str):
-        return token_data
-    elif isinstance(token_data, dict):
-        return token_data.get('token') or token_data.get('access_token') or token_data.get('api_key')
-    return str(token_data)
+PREDICTIONS_URL = f"{REPLICATE_API_BASE}/predictions"
+
+
+def _format_created_prediction(prediction):
+    """Render a newly created prediction as the create tool's response"""
+    parts = [
+        "Prediction created successfully!\n"
+        f"ID: {prediction.get('id')}\n"
+        f"Status: {prediction.get('status')}\n"
+        f"Model: {prediction.get('model')}\n"
+        f"Version: {prediction.get('version')}\n"
+        f"Created: {prediction.get('created_at')}\n"
+        f"URLs: {prediction.get('urls', {})}\n"
+    ]
+
+    if prediction.get('status') == 'succeeded':
+        parts.append(f"Output: {prediction.get('output')}\n")
+    elif prediction.get('status') == 'failed':
+        parts.append(f"Error: {prediction.get('error')}\n")
+
+    return "".join(parts)
 
 
 class CreatePredictionInput(BaseModel):
@@ -28,9 +45,12 @@ class CreatePredictionInput(BaseModel):
     webhook_events_filter: Optional[List[str]] = Field(None, description="List of events to send to webhook")
 
 
+@memoize_tool
 def create_replicate_prediction(name, description, token):
     """Create a new Replicate prediction"""
     tool_description = description or "Create a new prediction using a Replicate model"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token, "application/json")
 
     def create_prediction(
         model_version: str,
@@ -39,13 +59,6 @@ def create_replicate_prediction(name, description, token):
         webhook_events_filter: Optional[List[str]] = None
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
             data = {
                 "version": model_version,
                 "input": input_data
@@ -56,35 +69,22 @@ def create_replicate_prediction(name, description, token):
             if webhook_events_filter:
                 data["webhook_events_filter"] = webhook_events_filter
             
-            response = requests.post(
-                "https://api.replicate.com/v1/predictions",
+            response = SESSION.post(
+                PREDICTIONS_URL,
                 headers=headers,
-                json=data
+                data=dump_json(data),
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 201:
-                prediction = response.json()
-                result = f"Prediction created successfully!\n"
-                result += f"ID: {prediction.get('id')}\n"
-                result += f"Status: {prediction.get('status')}\n"
-                result += f"Model: {prediction.get('model')}\n"
-                result += f"Version: {prediction.get('version')}\n"
-                result += f"Created: {prediction.get('created_at')}\n"
-                result += f"URLs: {prediction.get('urls', {})}\n"
-                
-                if prediction.get('status') == 'succeeded':
-                    result += f"Output: {prediction.get('output')}\n"
-                elif prediction.get('status') == 'failed':
-                    result += f"Error: {prediction.get('error')}\n"
-                
-                return result
+                return _format_created_prediction(parse_json(response))
             else:
                 return f"Error creating prediction: {response.status_code} - {response.text}"
                 
         except Exception as e:
             return f"Failed to create Replicate prediction: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=create_prediction,
         name=name,
         description=tool_description,
@@ -93,73 +93,75 @@ def create_replicate_prediction(name, description, token):
     )
 
 
+def _format_prediction_details(prediction):
+    """Render a prediction's details as the get tool's response"""
+    parts = [
+        "Prediction Details:\n"
+        f"ID: {prediction.get('id')}\n"
+        f"Status: {prediction.get('status')}\n"
+        f"Model: {prediction.get('model')}\n"
+        f"Version: {prediction.get('version')}\n"
+        f"Created: {prediction.get('created_at')}\n"
+        f"Started: {prediction.get('started_at', 'Not started')}\n"
+        f"Completed: {prediction.get('completed_at', 'Not completed')}\n"
+    ]
+
+    # Input parameters
+    input_data = prediction.get('input', {})
+    if input_data:
+        parts.append(f"Input: {dump_json(input_data).decode()}\n")
+
+    # Output or error
+    if prediction.get('status') == 'succeeded':
+        output = prediction.get('output')
+        if output:
+            parts.append(f"Output: {dump_json(output).decode()}\n")
+    elif prediction.get('status') == 'failed':
+        error = prediction.get('error')
+        if error:
+            parts.append(f"Error: {error}\n")
+
+    # Logs
+    logs = prediction.get('logs')
+    if logs:
+        parts.append(f"Logs: {logs}\n")
+
+    # Metrics
+    metrics = prediction.get('metrics')
+    if metrics:
+        parts.append(f"Metrics: {dump_json(metrics).decode()}\n")
+
+    return "".join(parts)
+
+
 class GetPredictionInput(BaseModel):
     prediction_id: str = Field(description="ID of the prediction to retrieve")
 
 
+@memoize_tool
 def get_replicate_prediction(name, description, token):
     """Get details of a specific Replicate prediction"""
     tool_description = description or "Get the status and results of a specific Replicate prediction"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token)
 
     def get_prediction(prediction_id: str) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(
-                f"https://api.replicate.com/v1/predictions/{prediction_id}",
-                headers=headers
+            response = SESSION.get(
+                f"{PREDICTIONS_URL}/{prediction_id}",
+                headers=headers,
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                prediction = response.json()
-                
-                result = f"Prediction Details:\n"
-                result += f"ID: {prediction.get('id')}\n"
-                result += f"Status: {prediction.get('status')}\n"
-                result += f"Model: {prediction.get('model')}\n"
-                result += f"Version: {prediction.get('version')}\n"
-                result += f"Created: {prediction.get('created_at')}\n"
-                result += f"Started: {prediction.get('started_at', 'Not started')}\n"
-                result += f"Completed: {prediction.get('completed_at', 'Not completed')}\n"
-                
-                # Input parameters
-                input_data = prediction.get('input', {})
-                if input_data:
-                    result += f"Input: {json.dumps(input_data, indent=2)}\n"
-                
-                # Output or error
-                if prediction.get('status') == 'succeeded':
-                    output = prediction.get('output')
-                    if output:
-                        result += f"Output: {json.dumps(output, indent=2)}\n"
-                elif prediction.get('status') == 'failed':
-                    error = prediction.get('error')
-                    if error:
-                        result += f"Error: {error}\n"
-                
-                # Logs
-                logs = prediction.get('logs')
-                if logs:
-                    result += f"Logs: {logs}\n"
-                
-                # Metrics
-                metrics = prediction.get('metrics')
-                if metrics:
-                    result += f"Metrics: {json.dumps(metrics, indent=2)}\n"
-                
-                return result
+                return _format_prediction_details(parse_json(response))
             else:
                 return f"Error getting prediction: {response.status_code} - {response.text}"
                 
         except Exception as e:
             return f"Failed to get Replicate prediction: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=get_prediction,
         name=name,
         description=tool_description,
@@ -172,38 +174,36 @@ class CancelPredictionInput(BaseModel):
     prediction_id: str = Field(description="ID of the prediction to cancel")
 
 
+@memoize_tool
 def cancel_replicate_prediction(name, description, token):
     """Cancel a running Replicate prediction"""
     tool_description = description or "Cancel a running Replicate prediction"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token)
 
     def cancel_prediction(prediction_id: str) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
-                f"https://api.replicate.com/v1/predictions/{prediction_id}/cancel",
-                headers=headers
+            response = SESSION.post(
+                f"{PREDICTIONS_URL}/{prediction_id}/cancel",
+                headers=headers,
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                prediction = response.json()
-                result = f"Prediction cancelled successfully!\n"
-                result += f"ID: {prediction.get('id')}\n"
-                result += f"Status: {prediction.get('status')}\n"
-                result += f"Cancelled at: {prediction.get('completed_at', 'Now')}\n"
-                return result
+                prediction = parse_json(response)
+                return (
+                    "Prediction cancelled successfully!\n"
+                    f"ID: {prediction.get('id')}\n"
+                    f"Status: {prediction.get('status')}\n"
+                    f"Cancelled at: {prediction.get('completed_at', 'Now')}\n"
+                )
             else:
                 return f"Error cancelling prediction: {response.status_code} - {response.text}"
                 
         except Exception as e:
             return f"Failed to cancel Replicate prediction: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=cancel_prediction,
         name=name,
         description=tool_description,
@@ -212,64 +212,68 @@ def cancel_replicate_prediction(name, description, token):
     )
 
 
+def _format_prediction_summary(prediction):
+    """Render one entry of a prediction listing"""
+    error = ""
+    if prediction.get('status') == 'failed':
+        error = f"  Error: {prediction.get('error', 'Unknown error')}\n"
+
+    return (
+        f"• ID: {prediction.get('id')}\n"
+        f"  Status: {prediction.get('status')}\n"
+        f"  Model: {prediction.get('model')}\n"
+        f"  Created: {prediction.get('created_at')}\n"
+        f"  Completed: {prediction.get('completed_at', 'Not completed')}\n"
+        f"{error}\n"
+    )
+
+
+def _format_prediction_listing(predictions, next_url):
+    """Render a page of predictions as the list tool's response"""
+    parts = [f"Found {len(predictions)} predictions:\n\n"]
+    parts.extend(map(_format_prediction_summary, predictions))
+    if next_url:
+        parts.append(f"Next page cursor: {next_url}\n")
+    return "".join(parts)
+
+
 class ListPredictionsInput(BaseModel):
     cursor: Optional[str] = Field(None, description="Pagination cursor for next page")
     limit: Optional[int] = Field(20, description="Number of predictions to return")
 
 
+@memoize_tool
 def list_replicate_predictions(name, description, token):
     """List Replicate predictions"""
     tool_description = description or "List your Replicate predictions with pagination support"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token)
 
     def list_predictions(cursor: Optional[str] = None, limit: Optional[int] = 20) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
             params = {}
             if cursor:
                 params['cursor'] = cursor
             if limit:
                 params['limit'] = limit
             
-            response = requests.get(
-                "https://api.replicate.com/v1/predictions",
+            response = SESSION.get(
+                PREDICTIONS_URL,
                 headers=headers,
-                params=params
+                params=params,
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                data = response.json()
-                predictions = data.get('results', [])
-                
-                result = f"Found {len(predictions)} predictions:\n\n"
-                for prediction in predictions:
-                    result += f"• ID: {prediction.get('id')}\n"
-                    result += f"  Status: {prediction.get('status')}\n"
-                    result += f"  Model: {prediction.get('model')}\n"
-                    result += f"  Created: {prediction.get('created_at')}\n"
-                    result += f"  Completed: {prediction.get('completed_at', 'Not completed')}\n"
-                    
-                    if prediction.get('status') == 'failed':
-                        result += f"  Error: {prediction.get('error', 'Unknown error')}\n"
-                    
-                    result += "\n"
-                
-                if data.get('next'):
-                    result += f"Next page cursor: {data.get('next')}\n"
-                
-                return result
+                data = parse_json(response)
+                return _format_prediction_listing(data.get('results', []), data.get('next'))
             else:
                 return f"Error listing predictions: {response.status_code} - {response.text}"
                 
         except Exception as e:
             return f"Failed to list Replicate predictions: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=list_predictions,
         name=name,
         description=tool_description,
@@ -278,15 +282,50 @@ def list_replicate_predictions(name, description, token):
     )
 
 
+# Statuses after which a prediction will not change again
+TERMINAL_STATUSES = frozenset({'succeeded', 'failed', 'canceled'})
+
+
+def _wait_for_stream_end(stream_url, headers, timeout):
+    """
+    Block until a prediction's event stream reports that it has finished.
+
+    Returns True once a done or error event arrives, or False if the stream
+    can't be opened, closes early or outlasts timeout, so the caller can
+    fall back to polling.
+    """
+    deadline = time.monotonic() + timeout
+    stream_headers = {**headers, "Accept": "text/event-stream", "Cache-Control": "no-store"}
+
+    try:
+        with SESSION.get(stream_url, headers=stream_headers, stream=True, timeout=(CONNECT_TIMEOUT, max(timeout, 1))) as response:
+            if response.status_code != 200:
+                return False
+
+            response.encoding = 'utf-8'
+            for event, _ in iter_sse_events(response.iter_lines(decode_unicode=True)):
+                if event in ('done', 'error'):
+                    return True
+                if time.monotonic() >= deadline:
+                    return False
+    except requests.RequestException:
+        return False
+
+    return False
+
+
 class StreamPredictionInput(BaseModel):
     prediction_id: str = Field(description="ID of the prediction to stream")
     timeout: Optional[int] = Field(300, description="Timeout in seconds (default: 300)")
     poll_interval: Optional[int] = Field(5, description="Polling interval in seconds (default: 5)")
 
 
+@memoize_tool
 def stream_replicate_prediction(name, description, token):
     """Stream a Replicate prediction until completion"""
     tool_description = description or "Stream a Replicate prediction and wait for completion"
+    access_token = extract_token_from_data(token)
+    headers = api_headers(access_token)
 
     def stream_prediction(
         prediction_id: str,
@@ -294,71 +333,79 @@ def stream_replicate_prediction(name, description, token):
         poll_interval: Optional[int] = 5
     ) -> str:
         try:
-            access_token = extract_token_from_data(token)
-            
-            headers = {
-                "Authorization": f"Token {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            start_time = time.time()
-            result = f"Streaming prediction {prediction_id}...\n\n"
+            deadline = time.monotonic() + timeout
+            parts = [f"Streaming prediction {prediction_id}...\n\n"]
+            last_status = None
+            streamed = False
             
             while True:
                 # Check timeout
-                if time.time() - start_time > timeout:
-                    result += f"Timeout reached after {timeout} seconds\n"
+                if time.monotonic() > deadline:
+                    parts.append(f"Timeout reached after {timeout} seconds\n")
                     break
                 
                 # Get prediction status
-                response = requests.get(
-                    f"https://api.replicate.com/v1/predictions/{prediction_id}",
-                    headers=headers
+                response = SESSION.get(
+                    f"{PREDICTIONS_URL}/{prediction_id}",
+                    headers=headers,
+                    timeout=REQUEST_TIMEOUT
                 )
                 
                 if response.status_code != 200:
-                    result += f"Error getting prediction: {response.status_code} - {response.text}\n"
+                    parts.append(f"Error getting prediction: {response.status_code} - {response.text}\n")
                     break
                 
-                prediction = response.json()
+                prediction = parse_json(response)
                 status = prediction.get('status')
                 
-                result += f"Status: {status} at {prediction.get('created_at', 'unknown time')}\n"
+                # Log status changes only, so a long wait doesn't repeat
+                # the same line on every poll
+                if status != last_status:
+                    parts.append(f"Status: {status} at {prediction.get('created_at', 'unknown time')}\n")
+                    last_status = status
                 
                 # Check if completed
-                if status in ['succeeded', 'failed', 'canceled']:
-                    result += f"\nFinal Status: {status}\n"
+                if status in TERMINAL_STATUSES:
+                    parts.append(f"\nFinal Status: {status}\n")
                     
                     if status == 'succeeded':
                         output = prediction.get('output')
                         if output:
-                            result += f"Output: {json.dumps(output, indent=2)}\n"
+                            parts.append(f"Output: {dump_json(output).decode()}\n")
                     elif status == 'failed':
                         error = prediction.get('error')
                         if error:
-                            result += f"Error: {error}\n"
+                            parts.append(f"Error: {error}\n")
                     
                     # Add logs if available
                     logs = prediction.get('logs')
                     if logs:
-                        result += f"Logs: {logs}\n"
+                        parts.append(f"Logs: {logs}\n")
                     
                     # Add metrics if available
                     metrics = prediction.get('metrics')
                     if metrics:
-                        result += f"Metrics: {json.dumps(metrics, indent=2)}\n"
+                        parts.append(f"Metrics: {dump_json(metrics).decode()}\n")
                     
                     break
                 
-                # Wait before next poll
-                time.sleep(poll_interval)
+                # Wait on the event stream rather than polling when the model
+                # offers one, then fetch the final state straight away
+                stream_url = (prediction.get('urls') or {}).get('stream')
+                if stream_url and not streamed:
+                    streamed = True
+                    if _wait_for_stream_end(stream_url, headers, deadline - time.monotonic()):
+                        continue
+                
+                # Wait before next poll, but not past the deadline
+                time.sleep(min(poll_interval, max(deadline - time.monotonic(), 0)))
             
-            return result
+            return "".join(parts)
                 
         except Exception as e:
             return f"Failed to stream Replicate prediction: {str(e)}"
 
-    return StructuredTool.from_function(
+    return structured_tool().from_function(
         func=stream_prediction,
         name=name,
         description=tool_description,
@@ -5,15 +5,19 @@ This package provides authentication, configuration, and client utilities
 for interacting with the Replicate API.
 """
 
-from .replicate_auth import (
+from .replicate_client import (
     ReplicateClient,
-    ReplicateAuthError,
     ReplicateConfig as AuthConfig,
-    ReplicateTokenManager,
     create_replicate_client,
-    get_token_from_env,
-    validate_replicate_token,
-    require_replicate_auth
+    get_api_token_from_env,
+    set_api_token_env,
+    setup_replicate_auth,
+    validate_api_token
+)
+
+from .replicate_auth import (
+    ReplicateAuthClient,
+    validate_replicate_token
 )
 
 from .config import (
@@ -32,13 +36,14 @@ from .config import (
 __all__ = [
     # Authentication
     'ReplicateClient',
-    'ReplicateAuthError',
+    'ReplicateAuthClient',
     'AuthConfig',
-    'ReplicateTokenManager',
     'create_replicate_client',
-    'get_token_from_env',
+    'get_api_token_from_env',
+    'set_api_token_env',
+    'setup_replicate_auth',
+    'validate_api_token',
     'validate_replicate_token',
-    'require_replicate_auth',
     
     # Configuration
     'ReplicateConfig',
@@ -5,6 +5,7 @@ This module provides authentication and client configuration for Replicate API.
 """
 
 import os
+import functools
 import requests
 from typing import Optional, Dict, Any
 import json
@@ -29,19 +30,21 @@ class ReplicateClient:
             "Authorization": f"Token {self.api_token}",
             "Content-Type": "application/json"
         }
+        # Reused for every request so the connection pool stays warm
+        self.session = requests.Session()
     
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> requests.Response:
         """Make HTTP request to Replicate API"""
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         
         if method.upper() == 'GET':
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, headers=self.headers, params=params)
         elif method.upper() == 'POST':
-            response = requests.post(url, headers=self.headers, json=data, params=params)
+            response = self.session.post(url, headers=self.headers, json=data, params=params)
         elif method.upper() == 'PATCH':
-            response = requests.patch(url, headers=self.headers, json=data, params=params)
+            response = self.session.patch(url, headers=self.headers, json=data, params=params)
         elif method.upper() == 'DELETE':
-            response = requests.delete(url, headers=self.headers, params=params)
+            response = self.session.delete(url, headers=self.headers, params=params)
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
         
@@ -142,16 +145,26 @@ class ReplicateClient:
         raise TimeoutError(f"Prediction {prediction_id} did not complete within {timeout} seconds")
 
 
-def create_replicate_client(api_token: Optional[str] = None) -> ReplicateClient:
-    """Factory function to create Replicate client"""
+@functools.lru_cache(maxsize=16)
+def _get_client(api_token: Optional[str]) -> ReplicateClient:
+    """Return the shared client for a token, constructing it on first use"""
     return ReplicateClient(api_token)
 
 
+def create_replicate_client(api_token: Optional[str] = None) -> ReplicateClient:
+    """Factory function to create Replicate client
+
+    Clients are shared per token, so repeated calls reuse one session and
+    its pooled connections instead of building a new client each time.
+    """
+    return _get_client(api_token or get_api_token_from_env())
+
+
 # Authentication utilities
 def validate_api_token(api_token: str) -> bool:
     """Validate Replicate API token"""
     try:
-        client = ReplicateClient(api_token)
+        client = create_replicate_client(api_token)
         client.get_models(limit=1)
         return True
     except Exception:
@@ -185,7 +198,7 @@ class ReplicateConfig:
     
     def get_client(self) -> ReplicateClient:
         """Get configured client"""
-        return ReplicateClient(self.api_token)
+        return create_replicate_client(self.api_token)
     
     def validate_config(self) -> bool:
         """Validate current configuration"""
@@ -8,14 +8,17 @@ model management, predictions, and code generation.
 import pytest
 import os
 import json
+import asyncio
 from unittest.mock import Mock, patch, MagicMock
+import requests
 import requests_mock
 
 # Import the tools
 from agent_tools.replicate.replicate_tools import create_replicate_tools
 from agent_tools.replicate.models import (
     list_replicate_models, get_replicate_model, create_replicate_model,
-    update_replicate_model, delete_replicate_model
+    update_replicate_model, delete_replicate_model, get_replicate_models_batch,
+    MODEL_CACHE, MODEL_ETAGS
 )
 from agent_tools.replicate.predictions import (
     create_replicate_prediction, get_replicate_prediction, cancel_replicate_prediction,
@@ -23,8 +26,11 @@ from agent_tools.replicate.predictions import (
 )
 from agent_tools.replicate.code_generation import (
     generate_code_replicate, optimize_code_replicate, debug_code_replicate,
-    explain_code_replicate, convert_code_replicate
+    explain_code_replicate, convert_code_replicate, generate_code_batch_replicate,
+    run_many_replicate
 )
+from agent_tools.replicate._cache import RESPONSE_CACHE, DiskCache, _disk_cache_from_env
+from agent_tools.replicate._http import CircuitBreaker, CircuitOpenError, TokenBucket, _BreakerAdapter, dump_json, warm_up
 from client.replicate_client import ReplicateClient, validate_api_token
 
 
@@ -75,8 +81,9 @@ class TestModelTools:
         """Setup test environment"""
         self.test_token = "test_token_123"
         self.base_url = "https://api.replicate.com/v1"
+        MODEL_CACHE.clear()
+        MODEL_ETAGS.clear()
     
-    @requests_mock.Mocker()
     def test_list_models_success(self, m):
         """Test listing models successfully"""
         # Mock API response
@@ -103,7 +110,22 @@ class TestModelTools:
         assert "test_owner/test_model" in result
         assert "Test model description" in result
     
-    @requests_mock.Mocker()
+    def test_list_models_follows_pages(self, m):
+        """Test listing several pages in one call"""
+        next_url = f"{self.base_url}/models?cursor=page2"
+        m.get(f"{self.base_url}/models", [
+            {"json": {"results": [{"owner": "a", "name": "first"}], "next": next_url}},
+            {"json": {"results": [{"owner": "b", "name": "second"}], "next": None}}
+        ])
+        
+        tool = list_replicate_models("test_list_models", "Test description", self.test_token)
+        result = tool.run({"pages": 3})
+        
+        assert "Found 2 models" in result
+        assert "a/first" in result and "b/second" in result
+        assert "Next page cursor" not in result
+        assert m.request_history[1].url == next_url
+    
     def test_get_model_success(self, m):
         """Test getting specific model successfully"""
         mock_response = {
@@ -128,7 +150,56 @@ class TestModelTools:
         assert "Test model description" in result
         assert "Latest Version:" in result
     
-    @requests_mock.Mocker()
+    def test_get_models_batch(self, m):
+        """Test looking up several models in one call"""
+        m.get(f"{self.base_url}/models/owner_a/model_a", json={"owner": "owner_a", "name": "model_a"})
+        m.get(f"{self.base_url}/models/owner_b/model_b", status_code=404, text="Not found")
+        
+        tool = get_replicate_models_batch("test_get_models", "Test description", self.test_token)
+        result = tool.run({"models": ["owner_a/model_a", "owner_b/model_b", "bad"]})
+        
+        assert "Details for 3 models" in result
+        assert "Model: owner_a/model_a" in result
+        assert "Error getting model: 404" in result
+        assert "Invalid model reference 'bad'" in result
+    
+    def test_get_model_revalidates_with_etag(self, m):
+        """Test that an expired model is re-fetched with a conditional GET"""
+        model_url = f"{self.base_url}/models/test_owner/test_model"
+        m.get(model_url, [
+            {"json": {"owner": "test_owner", "name": "test_model"}, "headers": {"ETag": '"abc"'}},
+            {"status_code": 304}
+        ])
+        
+        tool = get_replicate_model("test_get_model", "Test description", self.test_token)
+        args = {"model_owner": "test_owner", "model_name": "test_model"}
+        first = tool.run(args)
+        MODEL_CACHE.clear()
+        second = tool.run(args)
+        
+        assert second == first
+        assert m.request_history[1].headers["If-None-Match"] == '"abc"'
+    
+    def test_get_model_cached_until_update(self, m):
+        """Test that model reads are cached and cleared by a write"""
+        model_url = f"{self.base_url}/models/test_owner/test_model"
+        m.get(model_url, [
+            {"json": {"owner": "test_owner", "name": "test_model", "description": "Before"}},
+            {"json": {"owner": "test_owner", "name": "test_model", "description": "After"}}
+        ])
+        m.patch(model_url, json={"owner": "test_owner", "name": "test_model", "visibility": "private"})
+        
+        get_tool = get_replicate_model("test_get_model", "Test description", self.test_token)
+        update_tool = update_replicate_model("test_update_model", "Test description", self.test_token)
+        args = {"model_owner": "test_owner", "model_name": "test_model"}
+        
+        assert "Description: Before" in get_tool.run(args)
+        assert "Description: Before" in get_tool.run(args)
+        assert m.call_count == 1
+        
+        update_tool.run({**args, "visibility": "private"})
+        assert "Description: After" in get_tool.run(args)
+    
     def test_create_model_success(self, m):
         """Test creating model successfully"""
         mock_response = {
@@ -160,7 +231,6 @@ class TestPredictionTools:
         self.test_token = "test_token_123"
         self.base_url = "https://api.replicate.com/v1"
     
-    @requests_mock.Mocker()
     def test_create_prediction_success(self, m):
         """Test creating prediction successfully"""
         mock_response = {
@@ -186,8 +256,8 @@ class TestPredictionTools:
         assert "Prediction created successfully!" in result
         assert "prediction_123" in result
         assert "starting" in result
+        assert m.last_request.headers["Content-Type"] == "application/json"
     
-    @requests_mock.Mocker()
     def test_get_prediction_success(self, m):
         """Test getting prediction successfully"""
         mock_response = {
@@ -213,6 +283,41 @@ class TestPredictionTools:
         assert "prediction_123" in result
         assert "succeeded" in result
         assert "Hello! How can I help you today?" in result
+        assert m.last_request.headers["Authorization"] == f"Token {self.test_token}"
+        assert "Content-Type" not in m.last_request.headers
+    
+    def test_stream_prediction_waits_on_event_stream(self, m):
+        """Test that streaming waits on the event stream instead of polling"""
+        stream_url = "https://stream.replicate.com/v1/files/stream_123"
+        m.get(f"{self.base_url}/predictions/prediction_123", [
+            {"json": {"id": "prediction_123", "status": "processing", "urls": {"stream": stream_url}}},
+            {"json": {"id": "prediction_123", "status": "succeeded", "output": "done"}}
+        ])
+        m.get(stream_url, text="event: output\ndata: done\n\nevent: done\ndata: {}\n\n")
+        
+        tool = stream_replicate_prediction("test_stream_prediction", "Test description", self.test_token)
+        with patch("agent_tools.replicate.predictions.time.sleep") as mock_sleep:
+            result = tool.run({"prediction_id": "prediction_123"})
+        
+        assert "Final Status: succeeded" in result
+        assert m.request_history[1].headers["Accept"] == "text/event-stream"
+        mock_sleep.assert_not_called()
+    
+    def test_stream_prediction_logs_status_changes_only(self, m):
+        """Test that polling logs each status once, not once per poll"""
+        m.get(f"{self.base_url}/predictions/prediction_123", [
+            {"json": {"id": "prediction_123", "status": "processing"}},
+            {"json": {"id": "prediction_123", "status": "processing"}},
+            {"json": {"id": "prediction_123", "status": "succeeded", "output": "done"}}
+        ])
+        
+        tool = stream_replicate_prediction("test_stream_prediction", "Test description", self.test_token)
+        with patch("agent_tools.replicate.predictions.time.sleep") as mock_sleep:
+            result = tool.run({"prediction_id": "prediction_123", "poll_interval": 1})
+        
+        assert result.count("Status: processing") == 1
+        assert "Final Status: succeeded" in result
+        assert mock_sleep.call_count == 2
 
 
 class TestCodeGenerationTools:
@@ -222,8 +327,8 @@ class TestCodeGenerationTools:
         """Setup test environment"""
         self.test_token = "test_token_123"
         self.base_url = "https://api.replicate.com/v1"
+        RESPONSE_CACHE.clear()
     
-    @requests_mock.Mocker()
     def test_generate_code_success(self, m):
         """Test code generation successfully"""
         # Mock prediction creation
@@ -251,7 +356,6 @@ class TestCodeGenerationTools:
         assert "def hello_world():" in result
         assert "Generation completed successfully!" in result
     
-    @requests_mock.Mocker()
     def test_optimize_code_success(self, m):
         """Test code optimization successfully"""
         # Mock prediction creation
@@ -279,6 +383,508 @@ class TestCodeGenerationTools:
         assert "Code Optimization Results (performance):" in result
         assert "Optimized code:" in result
         assert "Optimization completed successfully!" in result
+    
+    def test_generate_code_async_success(self, m):
+        """Test code generation through the async coroutine"""
+        create_response = {
+            "id": "prediction_456",
+            "status": "starting"
+        }
+        m.post(f"{self.base_url}/predictions", json=create_response, status_code=201)
+        
+        status_response = {
+            "id": "prediction_456",
+            "status": "succeeded",
+            "output": ["function add(a, b) {\n", "  return a + b;\n", "}"]
+        }
+        m.get(f"{self.base_url}/predictions/prediction_456", json=status_response)
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        result = asyncio.run(tool.ainvoke({
+            "prompt": "Add two numbers",
+            "language": "javascript"
+        }))
+        
+        assert "Generated javascript code:" in result
+        assert "function add(a, b) {\n  return a + b;\n}" in result
+        assert "Generation completed successfully!" in result
+    
+    def test_generate_code_async_over_httpx_client(self):
+        """Test that async predictions use the shared httpx client when enabled"""
+        httpx = pytest.importorskip("httpx")
+        
+        def handler(request):
+            if request.method == "POST":
+                assert json.loads(request.content)["stream"] is True
+                return httpx.Response(201, json={"id": "prediction_h2", "status": "starting"})
+            return httpx.Response(200, json={"id": "prediction_h2", "status": "succeeded", "output": "print('h2')"})
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with patch("agent_tools.replicate.code_generation.USE_HTTPX", True), \
+                    patch("agent_tools.replicate.code_generation.get_async_client", return_value=client):
+                return await tool.ainvoke({"prompt": "Print h2"})
+        
+        result = asyncio.run(run())
+        
+        assert "print('h2')" in result
+    
+    def test_generate_code_async_streams_over_httpx_client(self):
+        """Test that the async path reads the event stream through httpx"""
+        httpx = pytest.importorskip("httpx")
+        stream_url = "https://streaming.api.replicate.com/v1/files/abc123"
+        
+        def handler(request):
+            if request.method == "POST":
+                return httpx.Response(201, json={"id": "prediction_sse", "status": "starting", "urls": {"stream": stream_url}})
+            assert str(request.url) == stream_url
+            return httpx.Response(200, text="event: output\ndata: def f():\n\nevent: output\ndata:     pass\n\nevent: done\ndata: {}\n\n")
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with patch("agent_tools.replicate.code_generation.USE_HTTPX", True), \
+                    patch("agent_tools.replicate.code_generation.get_async_client", return_value=client):
+                return await tool.ainvoke({"prompt": "Define f"})
+        
+        result = asyncio.run(run())
+        
+        assert "def f():    pass" in result
+    
+    def test_generate_code_polls_with_backoff(self, m):
+        """Test that polling backs off while the prediction is running"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_789", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_789", [
+            {"json": {"id": "prediction_789", "status": "starting"}},
+            {"json": {"id": "prediction_789", "status": "processing"}},
+            {"json": {"id": "prediction_789", "status": "processing"}},
+            {"json": {"id": "prediction_789", "status": "succeeded", "output": "print('done')"}}
+        ])
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        with patch("agent_tools.replicate.code_generation.time.sleep") as mock_sleep, \
+                patch("agent_tools.replicate.code_generation.random.uniform", return_value=1.0):
+            result = tool.run({"prompt": "Print done"})
+        
+        assert "print('done')" in result
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert delays == pytest.approx([0.1, 0.13, 0.169])
+    
+    def test_generate_code_polls_honour_ca_bundle(self, m, monkeypatch):
+        """Test that status polls pick up REQUESTS_CA_BUNDLE like the create request"""
+        monkeypatch.setenv("REQUESTS_CA_BUNDLE", "/etc/ssl/proxy-ca.pem")
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_123", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_123", json={
+            "id": "prediction_123",
+            "status": "succeeded",
+            "output": "print('hi')"
+        })
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        tool.run({"prompt": "Say hi"})
+        
+        assert [r.verify for r in m.request_history] == ["/etc/ssl/proxy-ca.pem"] * 2
+    
+    def test_debug_code_prediction_failed(self, m):
+        """Test that a failed prediction is reported with the tool's message"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_123", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_123", json={
+            "id": "prediction_123",
+            "status": "failed",
+            "error": "CUDA out of memory"
+        })
+        
+        tool = debug_code_replicate("test_debug_code", "Test description", self.test_token)
+        result = tool.run({"code": "print(x)", "error_message": "NameError"})
+        
+        assert result == "Code debugging failed: CUDA out of memory"
+    
+    def test_explain_code_prediction_canceled(self, m):
+        """Test that a canceled prediction ends polling straight away"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_123", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_123", json={"id": "prediction_123", "status": "canceled"})
+        
+        tool = explain_code_replicate("test_explain_code", "Test description", self.test_token)
+        with patch("agent_tools.replicate.code_generation.time.sleep"):
+            result = tool.run({"code": "print(1)"})
+        
+        assert result == "Code explanation was canceled"
+        assert len(m.request_history) == 2
+    
+    def test_generate_code_streams_output(self, m):
+        """Test that output is read from the prediction's event stream"""
+        stream_url = "https://stream.replicate.com/v1/files/stream_123"
+        m.post(f"{self.base_url}/predictions", json={
+            "id": "prediction_123",
+            "status": "starting",
+            "urls": {"stream": stream_url}
+        }, status_code=201)
+        m.get(stream_url, text=(
+            "event: output\nid: 1\ndata: def add(a, b):\ndata: \n\n"
+            "event: output\nid: 2\ndata:     return a + b\n\n"
+            "event: done\ndata: {}\n\n"
+        ))
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        result = tool.run({"prompt": "Add two numbers"})
+        
+        assert "def add(a, b):\n    return a + b" in result
+        assert m.last_request.headers["Accept"] == "text/event-stream"
+        assert m.request_history[0].json()["stream"] is True
+        assert not any(r.url.endswith("/predictions/prediction_123") for r in m.request_history)
+    
+    def test_generate_code_polls_when_stream_drops(self, m):
+        """Test that a dropped event stream falls back to status polling"""
+        stream_url = "https://stream.replicate.com/v1/files/stream_123"
+        m.post(f"{self.base_url}/predictions", json={
+            "id": "prediction_123",
+            "status": "starting",
+            "urls": {"stream": stream_url}
+        }, status_code=201)
+        m.get(stream_url, exc=requests.exceptions.ConnectionError("dropped"))
+        m.get(f"{self.base_url}/predictions/prediction_123", json={
+            "id": "prediction_123",
+            "status": "succeeded",
+            "output": ["def add(a, b):\n    return a + b"]
+        })
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        result = tool.run({"prompt": "Add two numbers"})
+        
+        assert "def add(a, b):\n    return a + b" in result
+        assert m.last_request.url == f"{self.base_url}/predictions/prediction_123"
+    
+    def test_explain_code_served_from_cache(self, m):
+        """Test that a repeated request is answered from the response cache"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_123", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_123", json={
+            "id": "prediction_123",
+            "status": "succeeded",
+            "output": ["Adds two numbers."]
+        })
+        
+        tool = explain_code_replicate("test_explain_code", "Test description", self.test_token)
+        args = {"code": "def add(a, b): return a + b"}
+        first = tool.run(args)
+        second = tool.run(args)
+        
+        assert first == second
+        assert "Adds two numbers." in second
+        assert sum(1 for r in m.request_history if r.method == "POST") == 1
+        
+        tool.run({**args, "disable_cache": True})
+        assert sum(1 for r in m.request_history if r.method == "POST") == 2
+    
+    def test_cached_output_not_shared_across_tokens(self, m):
+        """Test that output cached for one token isn't served to another"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_123", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_123", json={
+            "id": "prediction_123",
+            "status": "succeeded",
+            "output": ["Adds two numbers."]
+        })
+        
+        args = {"code": "def add(a, b): return a + b"}
+        explain_code_replicate("test_explain_code", "Test description", "good_token").run(args)
+        explain_code_replicate("test_explain_code", "Test description", "bad_token").run(args)
+        
+        posts = [r for r in m.request_history if r.method == "POST"]
+        assert [r.headers["Authorization"] for r in posts] == ["Token good_token", "Token bad_token"]
+    
+    def test_generate_code_concurrent_requests_share_prediction(self, m):
+        """Test that identical in-flight requests reuse a single prediction"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_inflight", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_inflight", json={
+            "id": "prediction_inflight",
+            "status": "succeeded",
+            "output": "print('shared')"
+        })
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        
+        async def run_twice():
+            return await asyncio.gather(
+                tool.ainvoke({"prompt": "Print shared"}),
+                tool.ainvoke({"prompt": "Print shared"})
+            )
+        
+        first, second = asyncio.run(run_twice())
+        
+        assert first == second
+        assert "print('shared')" in first
+        assert sum(1 for request in m.request_history if request.method == "POST") == 1
+    
+    def test_generate_code_concurrent_requests_not_shared_across_tokens(self):
+        """Test that in-flight predictions are only shared by callers with the same token"""
+        async def prediction_for_token(model_name, input_data, headers, max_wait):
+            await asyncio.sleep(0.01)
+            if headers["Authorization"] == "Token bad_token":
+                return 'error', '401 - {"detail": "Invalid token"}'
+            return 'succeeded', "print('shared')"
+        
+        bad = generate_code_replicate("test_generate_code", "Test description", "bad_token")
+        good = generate_code_replicate("test_generate_code", "Test description", "good_token")
+        
+        async def run_both():
+            return await asyncio.gather(
+                bad.ainvoke({"prompt": "Print shared"}),
+                good.ainvoke({"prompt": "Print shared"})
+            )
+        
+        with patch("agent_tools.replicate.code_generation._execute_prediction_async",
+                   side_effect=prediction_for_token) as execute:
+            bad_result, good_result = asyncio.run(run_both())
+        
+        assert "Invalid token" in bad_result
+        assert "print('shared')" in good_result
+        assert execute.call_count == 2
+    
+    def test_generate_code_cancelled_waiter_keeps_shared_prediction(self):
+        """Test that cancelling a coalesced caller doesn't cancel the shared prediction"""
+        async def slow_prediction(*args):
+            await asyncio.sleep(0.05)
+            return 'succeeded', "print('slow')"
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        
+        async def run():
+            first = asyncio.ensure_future(tool.ainvoke({"prompt": "Print slow"}))
+            second = asyncio.ensure_future(tool.ainvoke({"prompt": "Print slow"}))
+            await asyncio.sleep(0.01)
+            second.cancel()
+            return await first
+        
+        with patch("agent_tools.replicate.code_generation._execute_prediction_async", side_effect=slow_prediction):
+            result = asyncio.run(run())
+        
+        assert "print('slow')" in result
+    
+    def test_generate_code_completes_within_create_request(self, m):
+        """Test that a prediction finished during Prefer: wait needs no polling"""
+        m.post(f"{self.base_url}/predictions", json={
+            "id": "prediction_sync",
+            "status": "succeeded",
+            "output": ["print(", "'fast')"]
+        }, status_code=201)
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        result = tool.run({"prompt": "Print fast"})
+        
+        assert "print('fast')" in result
+        assert len(m.request_history) == 1
+        assert m.request_history[0].headers["Prefer"] == "wait=60"
+    
+    def test_generate_code_timeout_cancels_prediction(self, m):
+        """Test that a prediction still running at the deadline is canceled"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_slow", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_slow", json={"id": "prediction_slow", "status": "processing"})
+        m.post(f"{self.base_url}/predictions/prediction_slow/cancel", json={"id": "prediction_slow", "status": "canceled"})
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        # The rate limiter reads the same clock; keep it out of the patched timeline
+        with patch("agent_tools.replicate.code_generation.PREDICTION_RATE_LIMITER"), \
+                patch("agent_tools.replicate.code_generation.time.sleep"), \
+                patch("agent_tools.replicate.code_generation.time.monotonic", side_effect=[0, 1, 400]):
+            result = tool.run({"prompt": "Never finish"})
+        
+        assert "Code generation timed out after 5 minutes" in result
+        urls = [r.url for r in m.request_history]
+        assert urls[-2] == f"{self.base_url}/predictions/prediction_slow"
+        assert urls[-1] == f"{self.base_url}/predictions/prediction_slow/cancel"
+    
+    def test_generate_code_error_while_waiting_cancels_prediction(self, m):
+        """Test that a prediction is canceled when waiting on it raises"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_lost", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_lost", exc=requests.exceptions.ConnectionError("reset"))
+        m.post(f"{self.base_url}/predictions/prediction_lost/cancel", json={"id": "prediction_lost", "status": "canceled"})
+        
+        tool = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        result = tool.run({"prompt": "Lose the connection"})
+        async_result = asyncio.run(tool.ainvoke({"prompt": "Lose the connection"}))
+        
+        assert "reset" in result and "reset" in async_result
+        cancels = [r for r in m.request_history if r.url.endswith("/predictions/prediction_lost/cancel")]
+        assert len(cancels) == 2
+    
+    def test_code_tools_are_memoized(self):
+        """Test that repeated factory calls reuse the tool for the same token"""
+        first = generate_code_replicate("test_generate_code", "Test description", self.test_token)
+        second = generate_code_replicate("test_generate_code", "Test description", {"token": self.test_token})
+        other = generate_code_replicate("test_generate_code", "Test description", "other_token")
+        
+        assert first is second
+        assert first is not other
+    
+    def test_generate_code_batch_success(self, m):
+        """Test generating code for several prompts in one tool call"""
+        def create_prediction(request, context):
+            context.status_code = 201
+            prompt = request.json()["input"]["prompt"]
+            return {"id": "prediction_sum" if "Sum" in prompt else "prediction_max", "status": "starting"}
+        
+        m.post(f"{self.base_url}/predictions", json=create_prediction)
+        m.get(f"{self.base_url}/predictions/prediction_sum", json={"status": "succeeded", "output": ["sum(xs)"]})
+        m.get(f"{self.base_url}/predictions/prediction_max", json={"status": "succeeded", "output": ["max(xs)"]})
+        
+        tool = generate_code_batch_replicate("test_generate_code_batch", "Test description", self.test_token)
+        args = {"prompts": ["Sum a list", "Largest item of a list"]}
+        
+        for result in (tool.run(args), asyncio.run(tool.ainvoke({**args, "disable_cache": True}))):
+            assert result.startswith("Generated 2 code snippets:")
+            assert result.index("### Task 1: Sum a list") < result.index("sum(xs)")
+            assert result.index("### Task 2: Largest item of a list") < result.index("max(xs)")
+    
+    def test_run_many_mixed_tasks(self, m):
+        """Test that a fanout runs each task through its own tool"""
+        m.post(f"{self.base_url}/predictions", json={"id": "prediction_many", "status": "starting"}, status_code=201)
+        m.get(f"{self.base_url}/predictions/prediction_many", json={
+            "id": "prediction_many",
+            "status": "succeeded",
+            "output": "analysis"
+        })
+        
+        tool = run_many_replicate("test_run_many", "Test description", self.test_token)
+        result = asyncio.run(tool.ainvoke({"tasks": [
+            {"kind": "optimize", "code": "x = 1"},
+            {"kind": "explain", "code": "x = 1", "detail_level": "basic"},
+            {"kind": "refactor", "code": "x = 1"}
+        ]}))
+        
+        assert "Completed 3 tasks:" in result
+        assert "### Task 1 (optimize)" in result
+        assert "Code Optimization Results (performance):" in result
+        assert "Code Explanation (basic level):" in result
+        assert "Unknown task kind 'refactor'" in result
+
+
+class TestReplicateCache:
+    """Test suite for the prediction response caches"""
+    
+    def test_disk_cache_modes(self, tmp_path):
+        """Test that the disk cache persists output and honours its mode"""
+        DiskCache(str(tmp_path), mode="readwrite").set("key", "print('cached')")
+        
+        assert DiskCache(str(tmp_path), mode="readonly").get("key") == "print('cached')"
+        assert DiskCache(str(tmp_path), mode="writeonly").get("key") is None
+        
+        DiskCache(str(tmp_path), mode="readonly").set("other", "ignored")
+        assert DiskCache(str(tmp_path), mode="readwrite").get("other") is None
+        
+        with pytest.raises(ValueError):
+            DiskCache(str(tmp_path), mode="sometimes")
+    
+    def test_disk_cache_evicts_oldest_entries(self, tmp_path):
+        """Test that the disk cache stays within max_entries"""
+        cache = DiskCache(str(tmp_path), mode="readwrite", max_entries=2)
+        for i in range(3):
+            with patch("agent_tools.replicate._cache.time.time", return_value=1000 + i):
+                cache.set(f"key{i}", f"value{i}")
+        
+        with patch("agent_tools.replicate._cache.time.time", return_value=1003):
+            assert cache.get("key0") is None
+            assert cache.get("key1") == "value1"
+            assert cache.get("key2") == "value2"
+        
+        cache.clear()
+        assert cache.get("key2") is None
+    
+    def test_disk_cache_unknown_env_mode_disables_cache(self, monkeypatch):
+        """Test that a bad REPLICATE_CACHE_MODE warns and turns the disk cache off"""
+        monkeypatch.setenv("REPLICATE_CACHE_MODE", "on")
+        
+        with pytest.warns(RuntimeWarning, match="REPLICATE_CACHE_MODE"):
+            cache = _disk_cache_from_env()
+        
+        assert cache.mode == "off"
+
+
+class TestReplicateHttp:
+    """Test suite for the shared HTTP plumbing"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.base_url = "https://api.replicate.com/v1"
+    
+    def test_warm_up_opens_connection(self, m):
+        """Test that warming up sends one request and ignores failures"""
+        m.head(self.base_url, status_code=401)
+        
+        warm_up()
+        
+        assert len(m.request_history) == 1
+        assert m.request_history[0].method == "HEAD"
+    
+    def test_token_bucket_limits_rate(self):
+        """Test that the prediction rate limiter waits once its burst is spent"""
+        bucket = TokenBucket(rate=2, capacity=2)
+        with patch("agent_tools.replicate._http.time.sleep") as mock_sleep:
+            for _ in range(4):
+                bucket.acquire()
+        
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert len(delays) == 2
+        assert delays[0] == pytest.approx(0.5, abs=0.05)
+        assert delays[1] == pytest.approx(1.0, abs=0.05)
+    
+    def test_circuit_breaker_opens_and_recovers(self):
+        """Test that the breaker fails fast after repeated failures and lets a trial call through later"""
+        breaker = CircuitBreaker(threshold=2, reset_after=30)
+        with patch("agent_tools.replicate._http.time.monotonic", return_value=0):
+            breaker.record_failure()
+            assert breaker.allow()
+            breaker.record_failure()
+            assert not breaker.allow()
+        
+        with patch("agent_tools.replicate._http.time.monotonic", return_value=31):
+            assert breaker.allow()
+            assert not breaker.allow()
+            breaker.record_success()
+            assert breaker.allow()
+    
+    def test_dump_json_fallback_matches_orjson(self):
+        """Test that request bodies are encoded the same with or without orjson"""
+        orjson = pytest.importorskip("orjson")
+        data = {"input": {"prompt": "Écris une fonction", "max_tokens": 2000}, "stream": True}
+        
+        with patch("agent_tools.replicate._http.orjson", None):
+            assert dump_json(data) == orjson.dumps(data)
+    
+    def test_open_circuit_still_lets_cancels_through(self):
+        """Test that an open circuit rejects API calls but not prediction cancels"""
+        breaker = CircuitBreaker(threshold=1, reset_after=30)
+        breaker.record_failure()
+        adapter = _BreakerAdapter(breaker)
+        
+        def prepared(method, url):
+            return requests.Request(method, url).prepare()
+        
+        with pytest.raises(CircuitOpenError):
+            adapter.send(prepared("GET", "https://api.replicate.com/v1/predictions/p1"))
+        
+        with patch("requests.adapters.HTTPAdapter.send", return_value=Mock(status_code=200)) as send:
+            adapter.send(prepared("POST", "https://api.replicate.com/v1/predictions/p1/cancel"))
+        assert send.call_count == 1
+    
+    def test_async_client_goes_through_circuit_breaker(self):
+        """Test that the httpx client fails fast while the circuit is open"""
+        httpx = pytest.importorskip("httpx")
+        from agent_tools.replicate._http import _BreakerTransport
+        
+        breaker = CircuitBreaker(threshold=2, reset_after=30)
+        transport = _BreakerTransport(breaker, httpx.MockTransport(lambda request: httpx.Response(503)))
+        
+        async def run():
+            async with httpx.AsyncClient(transport=transport) as client:
+                await client.get("https://api.replicate.com/v1/predictions/p1")
+                await client.get("https://api.replicate.com/v1/predictions/p1")
+                with pytest.raises(CircuitOpenError):
+                    await client.get("https://api.replicate.com/v1/predictions/p1")
+                return await client.post("https://api.replicate.com/v1/predictions/p1/cancel")
+        
+        assert asyncio.run(run()).status_code == 503
 
 
 class TestReplicateClient:
@@ -301,7 +907,6 @@ class TestReplicateClient:
         with pytest.raises(ValueError, match="Replicate API token is required"):
             ReplicateClient()
     
-    @requests_mock.Mocker()
     def test_validate_api_token_success(self, m):
         """Test API token validation success"""
         m.get("https://api.replicate.com/v1/models", json={"results": []})
@@ -309,7 +914,6 @@ class TestReplicateClient:
         result = validate_api_token(self.test_token)
         assert result is True
     
-    @requests_mock.Mocker()
     def test_validate_api_token_failure(self, m):
         """Test API token validation failure"""
         m.get("https://api.replicate.com/v1/models", status_code=401)
@@ -324,6 +928,7 @@ class TestIntegration:
     def setup_method(self):
         """Setup test environment"""
         self.test_token = "test_token_123"
+        MODEL_CACHE.clear()
     
     def test_tool_creation_and_execution(self):
         """Test creating and executing tools"""
@@ -339,7 +944,7 @@ class TestIntegration:
             assert hasattr(tool, 'args_schema')
             assert hasattr(tool, 'run')
     
-    @patch('requests.get')
+    @patch('agent_tools.replicate.models.SESSION.get')
     def test_error_handling(self, mock_get):
         """Test error handling in tools"""
         # Mock API error
@@ -355,6 +960,13 @@ class TestIntegration:
 
 
 # Test fixtures and utilities
+@pytest.fixture
+def m():
+    """Fixture mocking every request made through requests"""
+    with requests_mock.Mocker() as mocker:
+        yield mocker
+
+
 @pytest.fixture
 def mock_replicate_api():
     """Fixture for mocking Replicate API"""